@@ -0,0 +1,236 @@
+"""
+actionLog.py
+Author: James Richter
+Class: CS 499, Twitchell/Burton
+Last Updated: 10/18/2026
+
+Records the buttons a genome pressed in every frame of a game, so the
+game can be played back later without the genome or its network.
+
+Breakout has nothing random in it, so a game only depends on which
+buttons were pressed in each frame: left, right, and launch.  Those
+fit in one small number per frame, and since a genome tends to hold
+the same buttons for many frames in a row, the frames compress down
+to almost nothing.  Playing a log back headless checks the score it
+ends with in a few milliseconds.
+
+A log is a header followed by little-endian numbers, in this order:
+
+   "NEATGAME", version
+   seed of the training run (-1 if not known), generation, score,
+   number of frames, fingerprint of the genome's network
+   the frames, one byte each, compressed with zlib
+
+Logs are never written over.  Each one gets the next free number on
+the end of its filename, the same number as the genome that played it.
+"""
+
+import breakout
+from breakout import LEFT_THRESHOLD, RIGHT_THRESHOLD, SPACE_THRESHOLD
+
+from array import array
+import os.path
+import struct
+import zlib
+
+MAGIC = "NEATGAME"
+VERSION = 1
+
+HEADER = struct.Struct("<8sI")
+GAME = struct.Struct("<qqqI20s")
+
+# the bits of a frame
+LEFT = 1
+RIGHT = 2
+LAUNCH = 4
+
+# the joystick values that press each button, for playing a log back
+NO_PRESS = 0.0
+PRESS_LEFT = 1.0
+PRESS_RIGHT = -1.0
+PRESS_LAUNCH = 1.0
+
+def encodeAction(action):
+   """
+   Get the buttons a joystick action presses, the same way
+   Bricka.check_input() reads them.
+
+   Args:
+      action: the joystick values, the same as Bricka.inputs
+
+   Returns:
+      frame: the LEFT, RIGHT and LAUNCH bits of the buttons pressed
+   """
+   frame = 0
+   if action[0] >= LEFT_THRESHOLD:
+      frame |= LEFT
+   elif action[0] <= RIGHT_THRESHOLD:
+      frame |= RIGHT
+   if action[1] > SPACE_THRESHOLD:
+      frame |= LAUNCH
+   return frame
+
+def decodeAction(frame):
+   """Get joystick values that press the buttons in a frame."""
+   horizontal = NO_PRESS
+   if frame & LEFT:
+      horizontal = PRESS_LEFT
+   elif frame & RIGHT:
+      horizontal = PRESS_RIGHT
+   return (horizontal, PRESS_LAUNCH if frame & LAUNCH else NO_PRESS)
+
+class ActionLog:
+   """A game of Breakout, as the buttons pressed in every frame."""
+   def __init__(self, seed = None, generation = 0, fingerprint = ""):
+      """
+      Initialize an empty log.
+
+      Args:
+         seed: the random seed the training run started from, if known
+         generation: the generation the genome played in
+         fingerprint: fitnessCache.fingerprint() of the genome
+      """
+      self.seed = seed
+      self.generation = generation
+      self.fingerprint = fingerprint
+      self.score = 0
+      self.frames = array('B')
+
+   def __len__(self):
+      return self.frames.__len__()
+
+   def save(self, filename):
+      """Save the log to a file, which is written over if it exists."""
+      seed = self.seed
+      if seed == None:
+         seed = -1
+      with open(filename, "wb") as f:
+         f.write(HEADER.pack(MAGIC, VERSION))
+         f.write(GAME.pack(seed, self.generation, self.score,
+                           self.frames.__len__(), self.fingerprint))
+         f.write(zlib.compress(self.frames.tostring(), 9))
+
+def freeVersion(*filenames):
+   """
+   Find the first number that none of the filenames has on its end yet,
+   so that files saved together, such as a winning genome and its log,
+   get the same number.
+
+   Args:
+      filenames: the filenames, without a number
+
+   Returns:
+      version: the number
+   """
+   version = 1
+   while any(os.path.exists(filename + "." + str(version))
+             for filename in filenames):
+      version += 1
+   return version
+
+def latestVersion(filename):
+   """
+   Find the file with the highest number on the end of filename.
+
+   Returns:
+      filename: the file, or None if there are none
+   """
+   directory, name = os.path.split(filename)
+   versions = []
+   for entry in os.listdir(directory or os.curdir):
+      stem, _, number = entry.rpartition(".")
+      if stem == name and number.isdigit():
+         versions.append(int(number))
+   if not versions:
+      return None
+   return filename + "." + str(max(versions))
+
+def load(filename):
+   """
+   Load an action log.
+
+   Args:
+      filename: the file to load from
+
+   Returns:
+      log: the ActionLog
+   """
+   with open(filename, "rb") as f:
+      data = f.read()
+   try:
+      magic, version = HEADER.unpack_from(data)
+   except struct.error:
+      raise ValueError(filename + " is not an action log")
+   if magic != MAGIC:
+      raise ValueError(filename + " is not an action log")
+   if version != VERSION:
+      raise ValueError(filename + " is action log version " + str(version) +
+                       ", but only version " + str(VERSION) + " can be read")
+   try:
+      seed, generation, score, number_frames, fingerprint = \
+         GAME.unpack_from(data, HEADER.size)
+      frames = zlib.decompress(data[HEADER.size + GAME.size:])
+   except (struct.error, zlib.error):
+      raise ValueError("action log is cut short")
+   if frames.__len__() != number_frames:
+      raise ValueError("action log is cut short")
+
+   log = ActionLog(seed if seed != -1 else None, generation, fingerprint)
+   log.score = score
+   log.frames.fromstring(frames)
+   return log
+
+def record(genome1, brkout, seed = None, generation = 0, fingerprint = ""):
+   """
+   Play one game with a genome at the controls, and log it.
+
+   Args:
+      genome1: the genome playing the game
+      brkout: a headless instance of the game breakout
+      seed, generation, fingerprint: passed on to the ActionLog
+
+   Returns:
+      log: the ActionLog of the game
+   """
+   log = ActionLog(seed, generation, fingerprint)
+   activate = genome1.network.activateNetwork
+   append = log.frames.append
+   observation = brkout.reset()
+   done = False
+   while not done:
+      action = activate(observation)
+      append(encodeAction(action))
+      observation, reward, done, info = brkout.step(action)
+   log.score = brkout.score
+   return log
+
+def replay(log, brkout):
+   """
+   Play a logged game back.
+
+   Args:
+      log: the ActionLog
+      brkout: an instance of the game breakout
+
+   Returns:
+      score: the score the game ended with, or None if the window was
+      closed or the game ended on a different frame than the log did
+   """
+   brkout.reset()
+   step = brkout.step
+   last_frame = log.frames.__len__() - 1
+   for i, frame in enumerate(log.frames):
+      observation, reward, done, info = step(decodeAction(frame))
+      if info["closed"] or done != (i == last_frame):
+         return None
+   return brkout.score
+
+def verify(log):
+   """
+   Play a logged game back headless, and check that it ends with the
+   score it was logged with.
+
+   Returns:
+      matches: True if the score matches
+   """
+   return replay(log, breakout.Bricka(headless=True)) == log.score
@@ -0,0 +1,255 @@
+"""
+batchBreakout.py
+Author: James Richter
+Class: CS 499, Twitchell/Burton
+Last Updated: 10/18/2026
+
+Many games of Breakout played at once, one frame at a time.
+
+Instead of one pygame.Rect per ball, paddle and brick, every game's
+state is a row in a NumPy array, and one call to step() moves every
+game forward a frame.  The rules are the same as breakout.Bricka:
+the ball speeds up and slows down the same way, a glancing hit off the
+paddle gives the same angles, the score goes down by one every frame,
+and a game times out once its score reaches -100.  pygame.Rect
+truncates coordinates towards zero, so we do too, which keeps every
+game frame for frame identical to Bricka in headless mode.
+
+A game is over once its board is cleared, the same as in Bricka, and
+is marked in won.
+
+A game that has ended is masked out and left alone until every game
+is done, or until it is dropped from the batch with keep().
+"""
+
+from breakout import LEFT_THRESHOLD, RIGHT_THRESHOLD, SPACE_THRESHOLD
+from breakout import SCREEN_WIDTH
+from breakout import BRICK_WIDTH, BRICK_HEIGHT, PADDLE_WIDTH, PADDLE_HEIGHT
+from breakout import BALL_DIAMETER, PADDLE_SPEED, SPEED_MULTIPLIER
+from breakout import MAX_BALL_SPEED, MIN_BALL_SPEED, POINTS
+from breakout import MAX_PADDLE_X, MAX_BALL_X, MAX_BALL_Y, PADDLE_Y
+from breakout import STATE_BALL_IN_PADDLE, STATE_PLAYING, STATE_WON
+from breakout import STATE_GAME_OVER
+from breakout import BRICK_ROWS, BRICK_COLUMNS, WALL_TOP
+
+import numpy as np
+
+# the brick wall is 7 rows of 10 bricks, in the same order as
+# Bricka.create_bricks() so that the first brick hit is the same one
+NUM_BRICKS = BRICK_ROWS * BRICK_COLUMNS
+BRICK_LEFT = np.tile(np.arange(BRICK_COLUMNS) * BRICK_WIDTH, BRICK_ROWS)
+BRICK_TOP = np.repeat(WALL_TOP + np.arange(BRICK_ROWS) * BRICK_HEIGHT,
+                      BRICK_COLUMNS)
+
+class BatchBricka:
+   """
+   A batch of games of Breakout.  Coordinates are kept as floats that
+   always hold whole numbers, the same values a pygame.Rect would hold.
+   """
+   def __init__(self, num_games):
+      """
+      Start num_games new games.
+
+      Args:
+         num_games: the number of games played at once.
+      """
+      self.num_games = num_games
+      self.score = np.zeros(num_games, dtype=np.int64)
+      self.state = np.zeros(num_games, dtype=np.int8)
+      self.paddle_left = np.zeros(num_games)
+      self.ball_left = np.zeros(num_games)
+      self.ball_top = np.zeros(num_games)
+      self.ball_vel = np.zeros((num_games, 2))
+      self.bricks = np.zeros((num_games, NUM_BRICKS), dtype=bool)
+      self.done = np.zeros(num_games, dtype=bool)
+      self.won = np.zeros(num_games, dtype=bool)
+      self.fitness = np.zeros(num_games, dtype=np.int64)
+      self.reset()
+
+   def reset(self):
+      """Start every game over with a score of 0."""
+      self.score[:] = 0
+      self.done[:] = False
+      self.won[:] = False
+      self.fitness[:] = 0
+      self.init_game(np.ones(self.num_games, dtype=bool))
+
+   def keep(self, games):
+      """
+      Drop every game that is not in the mask games.  The games that
+      are left keep their order.
+
+      Args:
+         games: a boolean mask of the games to keep.
+      """
+      self.num_games = int(games.sum())
+      self.score = self.score[games]
+      self.state = self.state[games]
+      self.paddle_left = self.paddle_left[games]
+      self.ball_left = self.ball_left[games]
+      self.ball_top = self.ball_top[games]
+      self.ball_vel = self.ball_vel[games]
+      self.bricks = self.bricks[games]
+      self.done = self.done[games]
+      self.won = self.won[games]
+      self.fitness = self.fitness[games]
+
+   def init_game(self, games):
+      """
+      Set up a new board for some of the games, keeping their score.
+
+      Args:
+         games: a boolean mask of the games to set up.
+      """
+      self.state[games] = STATE_BALL_IN_PADDLE
+      self.paddle_left[games] = 300
+      self.ball_left[games] = 300
+      self.ball_top[games] = PADDLE_Y - BALL_DIAMETER
+      self.ball_vel[games] = (5, -5)
+      self.bricks[games] = True
+
+   def observe(self):
+      """
+      Get what each computer player can see of its game.
+
+      Returns:
+         an array with a row for every game, holding the same values as
+         Bricka.observe().
+      """
+      observations = np.empty((self.num_games, 3))
+      observations[:,0] = ((self.ball_left + BALL_DIAMETER / 2) -
+                           (self.paddle_left + PADDLE_WIDTH / 2)) \
+                          / float(SCREEN_WIDTH)
+      observations[:,1] = self.ball_vel[:,0] / 100.
+      observations[:,2] = self.ball_vel[:,1] / 100.
+      return observations
+
+   def step(self, inputs):
+      """
+      Play one frame of every game that is still going.
+
+      Args:
+         inputs: an array with a row of joystick values for every game,
+         the same as Bricka.inputs.
+
+      Returns:
+         observations: the observations after the frame, see observe().
+      """
+      active = ~self.done
+      self.score[active] -= 1
+      self.check_input(active, inputs)
+
+      state = self.state
+      playing = active & (state == STATE_PLAYING)
+      game_over = active & (state == STATE_GAME_OVER)
+      in_paddle = active & (state == STATE_BALL_IN_PADDLE)
+
+      self.move_ball(playing)
+      self.handle_collisions(playing)
+      self.ball_left[in_paddle] = self.paddle_left[in_paddle] + \
+                                  PADDLE_WIDTH / 2
+      self.ball_top[in_paddle] = PADDLE_Y - BALL_DIAMETER
+      self.finish(game_over)
+
+      self.finish(active & ~game_over &
+                  (self.won | (self.score <= -100)))
+      return self.observe()
+
+   def finish(self, games):
+      """Record the final score of some games and mask them out."""
+      self.fitness[games] = self.score[games]
+      self.done |= games
+
+   def check_input(self, games, inputs):
+      """Move the paddles and launch the balls of some games."""
+      paddle = self.paddle_left
+      left = games & (inputs[:,0] >= LEFT_THRESHOLD)
+      right = games & ~left & (inputs[:,0] <= RIGHT_THRESHOLD)
+      paddle[left] = np.maximum(paddle[left] - PADDLE_SPEED, 0)
+      paddle[right] = np.minimum(paddle[right] + PADDLE_SPEED, MAX_PADDLE_X)
+
+      launch = games & (inputs[:,1] > SPACE_THRESHOLD) & \
+               (self.state == STATE_BALL_IN_PADDLE)
+      self.ball_vel[launch] = (5, -5)
+      self.state[launch] = STATE_PLAYING
+
+   def move_ball(self, games):
+      """Move the balls of some games, bouncing off the walls."""
+      vel = self.ball_vel
+      left = self.ball_left
+      top = self.ball_top
+      left[games] = np.trunc(left[games] + vel[games,0])
+      top[games] = np.trunc(top[games] + vel[games,1])
+
+      hit_left = games & (left <= 0)
+      hit_right = games & ~hit_left & (left >= MAX_BALL_X)
+      left[hit_left] = 0
+      left[hit_right] = MAX_BALL_X
+      flip = hit_left | hit_right
+      vel[flip,0] = -vel[flip,0]
+
+      hit_top = games & (top < 0)
+      hit_bottom = games & ~hit_top & (top >= MAX_BALL_Y)
+      top[hit_top] = 0
+      top[hit_bottom] = MAX_BALL_Y
+      flip = hit_top | hit_bottom
+      vel[flip,1] = -vel[flip,1]
+
+   def handle_collisions(self, games):
+      """
+      Handle collisions between the balls of some games and their
+      bricks and paddles, the same way as Bricka.handle_collisions().
+      """
+      vel = self.ball_vel
+      left = self.ball_left[:,None]
+      top = self.ball_top[:,None]
+
+      # only the first brick the ball overlaps is hit
+      hits = (left < BRICK_LEFT + BRICK_WIDTH) & \
+             (left + BALL_DIAMETER > BRICK_LEFT) & \
+             (top < BRICK_TOP + BRICK_HEIGHT) & \
+             (top + BALL_DIAMETER > BRICK_TOP) & \
+             self.bricks & games[:,None]
+      hit = hits.any(axis=1)
+      first = hits.argmax(axis=1)
+      self.score[hit] += POINTS
+      vel[hit,1] = -vel[hit,1]
+      self.bricks[hit, first[hit]] = False
+
+      cleared = games & ~self.bricks.any(axis=1)
+      self.state[cleared] = STATE_WON
+      self.won |= cleared
+
+      left = self.ball_left
+      top = self.ball_top
+      paddle = self.paddle_left
+      on_paddle = games & \
+                  (left < paddle + PADDLE_WIDTH) & \
+                  (left + BALL_DIAMETER > paddle) & \
+                  (top < PADDLE_Y + PADDLE_HEIGHT) & \
+                  (top + BALL_DIAMETER > PADDLE_Y)
+
+      too_fast = on_paddle & \
+                 (vel[:,0]**2 + vel[:,1]**2 > MAX_BALL_SPEED)
+      vel[too_fast,0] *= 0.9
+      vel[too_fast,1] *= 0.95
+      too_slow = on_paddle & (vel[:,0]**2 < MIN_BALL_SPEED)
+      vel[too_slow,0] *= 1.15
+      too_slow = on_paddle & (vel[:,1]**2 < MIN_BALL_SPEED)
+      vel[too_slow,1] *= 1.15
+      top[on_paddle] = PADDLE_Y - BALL_DIAMETER
+
+      # the angle goes from 59 to -12
+      angle = left - paddle
+      edge = on_paddle & ((angle <= 2) | (angle >= 45))
+      middle = on_paddle & ~edge & (angle >= 16) & (angle <= 30)
+      between = on_paddle & ~edge & ~middle
+      vel[edge,1] /= -1 * SPEED_MULTIPLIER
+      vel[edge,0] *= SPEED_MULTIPLIER ** 2
+      vel[middle,1] *= -1 * SPEED_MULTIPLIER ** 2
+      vel[middle,0] /= SPEED_MULTIPLIER
+      vel[between,0] *= SPEED_MULTIPLIER
+      vel[between,1] = -vel[between,1] * SPEED_MULTIPLIER
+
+      # with one life, a missed ball ends the game
+      self.state[games & ~on_paddle & (top > PADDLE_Y)] = STATE_GAME_OVER
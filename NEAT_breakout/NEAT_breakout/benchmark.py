@@ -0,0 +1,606 @@
+"""
+benchmark.py
+Author: James Richter
+Class: CS 499, Twitchell/Burton
+Last Updated: 10/18/2026
+
+Benchmarks for the parts of the NEAT system that training spends its
+time in, so that a change can be checked for making things slower.
+
+Every benchmark starts from a fixed seed, and builds its own genomes
+with a set number of genes (10, 100 and 1000), so two runs of the
+suite time exactly the same work.  The results are saved as JSON:
+
+python benchmark.py run --output before.json
+python benchmark.py run --output after.json
+python benchmark.py compare before.json after.json
+
+compare lists how much faster or slower each benchmark got, and exits
+with a status of 1 if any of them got slower by more than --threshold.
+
+python benchmark.py speciation
+
+compares sorting genomes into species with a MinHash index against
+checking every representative, with how long each took and how many
+genomes ended up in a different species.
+
+python benchmark.py skip-idle
+
+plays every game of a few seeded generations twice in lockstep, once
+skipping idle frames and once a frame at a time, and exits with a
+status of 1 if any game is ever in a different state.
+
+python benchmark.py win-log
+
+evolves a seeded population until a genome clears a board, and checks
+that the win is noticed, by the batch games too, and saved as a
+genome and an action log that plays back with the same score.
+"""
+
+import actionLog
+import breakout
+import evaluation
+import population
+import species
+from genome import Genome
+from geneIndex import gene_index
+from network import MAX_LAYER
+from network import sigmoid
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from timeit import default_timer
+
+SEED = 499
+GENE_COUNTS = [10, 100, 1000]
+
+# the number of related genomes the synthetic populations start from
+ANCESTORS = 10
+
+# the number of genomes sorted into species, and the number of genes
+# each one has
+SPECIATION_SIZES = [200, 5000]
+SPECIATION_GENES = 100
+
+# the (bands, rows) of the MinHash indexes the speciation report tries
+MIN_HASH_SETTINGS = [(32, 2), (16, 2), (16, 4), (8, 4)]
+
+# a headless episode is cut off after this many frames
+EPISODE_FRAMES = 5000
+
+# a population evolved from this seed clears a board in its 11th
+# generation
+WIN_SEED = 1
+
+def timeCalls(function, number, repeat):
+   """
+   Time a function.
+
+   Args:
+      function: the function to time, called with no arguments
+      number: the number of calls timed together
+      repeat: the number of times to time number calls
+
+   Returns:
+      result: a dictionary with the best and median seconds per call
+   """
+   times = []
+   for i in range(repeat):
+      start_time = default_timer()
+      for j in xrange(number):
+         function()
+      times.append((default_timer() - start_time) / number)
+   times.sort()
+   return {"best": times[0], "median": times[times.__len__() / 2],
+           "number": number, "repeat": repeat}
+
+def syntheticGenome(num_genes):
+   """
+   Make a random genome with num_genes enabled genes, about a quarter
+   as many hidden nodes, and every connection going forward.
+
+   Args:
+      num_genes: the number of genes
+
+   Returns:
+      genome1: the genome
+   """
+   genome1 = Genome(species.INPUTS, species.OUTPUTS, 0, 0)
+   for node in random.sample(xrange(1, MAX_LAYER + 1),
+                             max(1, num_genes / 4)):
+      genome1.nodes.add(node)
+   nodes = sorted(genome1.nodes)
+   connected = set()
+   while genome1.innovations.__len__() < num_genes:
+      node1, node2 = sorted(random.sample(nodes, 2))
+      if node1 > MAX_LAYER or node2 <= 0 or (node1, node2) in connected:
+         continue
+      connected.add((node1, node2))
+      genome1.addGene(node1, node2)
+   return genome1
+
+def relatedGenome(genome1):
+   """Make a copy of a genome, and mutate it a little."""
+   genome2 = Genome(genome1.num_inputs, genome1.num_outputs, 0, 0)
+   genome2.copy(genome1)
+   for i in range(3):
+      genome2.mutate()
+   return genome2
+
+def syntheticPopulation(num_genes, num_ancestors = ANCESTORS):
+   """
+   Make a population of genomes with about num_genes genes each, all
+   close relatives of a few ancestors, with random fitnesses.  The
+   same population is made every time.
+
+   Args:
+      num_genes: the number of genes each ancestor has
+      num_ancestors: the number of ancestors
+
+   Returns:
+      pool: the population
+   """
+   random.seed(SEED)
+   gene_index.__init__()
+   pool = population.Population()
+   ancestors = [syntheticGenome(num_genes) for i in range(num_ancestors)]
+   for name, specie in pool.species.items():
+      genome1 = relatedGenome(random.choice(ancestors))
+      genome1.species = name
+      genome1.fitness = random.randint(-100, 2000)
+      specie.genomes = {0: genome1}
+   return pool
+
+def benchmarkGenomes(results, num_genes):
+   """Time the genome and network benchmarks with num_genes genes."""
+   random.seed(SEED)
+   gene_index.__init__()
+   genome1 = syntheticGenome(num_genes)
+   genome2 = relatedGenome(genome1)
+   genome1.fitness = 100
+   genome2.fitness = 50
+   specie = species.Species(0)
+   number = max(1, 10000 / num_genes)
+   suffix = "/%d" % num_genes
+
+   results["Network.generateNetwork" + suffix] = \
+      timeCalls(genome1.generateNetwork, number, 5)
+   inputs = (0.1, 0.05, -0.05)
+   activate = genome1.network.activateNetwork
+   results["Network.activateNetwork" + suffix] = \
+      timeCalls(lambda: activate(inputs), number * 10, 5)
+   results["population.deltaGenome" + suffix] = \
+      timeCalls(lambda: population.deltaGenome(genome1, genome2), number, 5)
+   results["Species.mate" + suffix] = \
+      timeCalls(lambda: specie.mate(genome1, genome2), number, 5)
+
+   # mutate a fresh copy each time, so the genome doesn't keep growing
+   copies = []
+   for i in range(number * 5):
+      copy1 = Genome(genome1.num_inputs, genome1.num_outputs, 0, 0)
+      copy1.copy(genome1)
+      copies.append(copy1)
+   mutations = iter(copies)
+   results["Genome.mutate" + suffix] = \
+      timeCalls(lambda: next(mutations).mutate(), number, 5)
+
+def timePhase(prepare, phase, repeat):
+   """
+   Time one phase of a generation, starting each time from a fresh
+   population made by prepare().
+   """
+   times = []
+   for i in range(repeat):
+      pool = prepare()
+      start_time = default_timer()
+      phase(pool)
+      times.append(default_timer() - start_time)
+   times.sort()
+   return {"best": times[0], "median": times[times.__len__() / 2],
+           "number": 1, "repeat": repeat}
+
+def benchmarkPopulation(results, num_genes):
+   """Time the population benchmarks with num_genes genes."""
+   repeat = 5 if num_genes < 1000 else 3
+   suffix = "/%d" % num_genes
+   prepare = lambda: syntheticPopulation(num_genes)
+
+   def sorted_population():
+      pool = syntheticPopulation(num_genes)
+      pool.sortTheGenomesIntoSpecies()
+      pool.removeLowestPerformers()
+      return pool
+
+   results["Population.sortTheGenomesIntoSpecies" + suffix] = \
+      timePhase(prepare, lambda pool: pool.sortTheGenomesIntoSpecies(),
+                repeat)
+   results["Population.allocateSpecies" + suffix] = \
+      timePhase(sorted_population, lambda pool: pool.allocateSpecies(),
+                repeat)
+   results["Population.nextGeneration" + suffix] = \
+      timePhase(prepare, lambda pool: pool.nextGeneration(), repeat)
+
+def benchmarkSpeciation(results, size):
+   """
+   Time sorting a population of size genomes into species, with about
+   20 genomes related to each ancestor.
+   """
+   generation_size = population.GENERATION_SIZE
+   population.GENERATION_SIZE = size
+   try:
+      results["Population.sortTheGenomesIntoSpecies/genomes/%d" % size] = \
+         timePhase(lambda: syntheticPopulation(SPECIATION_GENES, size / 20),
+                   lambda pool: pool.sortTheGenomesIntoSpecies(), 3)
+   finally:
+      population.GENERATION_SIZE = generation_size
+
+def speciationAgreement(prepare, min_hash):
+   """
+   Sort a population into species, and time it.
+
+   Args:
+      prepare: makes the population, the same one every time
+      min_hash: the (bands, rows) of the MinHash index, or None
+
+   Returns:
+      seconds: how long sorting took
+      species_of: {(species, key): species} for every genome, by where
+      it was before sorting
+   """
+   pool = prepare()
+   pool.min_hash = min_hash
+   places = {}
+   for name, specie in pool.species.items():
+      for key, genome1 in specie.genomes.items():
+         places[id(genome1)] = (name, key)
+   start_time = default_timer()
+   pool.sortTheGenomesIntoSpecies()
+   seconds = default_timer() - start_time
+   species_of = {}
+   for name, specie in pool.species.items():
+      for genome1 in specie.genomes.values():
+         species_of[places[id(genome1)]] = name
+   return seconds, species_of
+
+def speciationReport():
+   """
+   Print how long sorting populations into species takes with each of
+   MIN_HASH_SETTINGS and with every representative checked, and the
+   percentage of genomes that end up in a different species.
+   """
+   generation_size = population.GENERATION_SIZE
+   print "%-8s %-10s %10s %10s" % ("genomes", "min hash", "seconds",
+                                   "differ")
+   try:
+      for size in SPECIATION_SIZES:
+         population.GENERATION_SIZE = size
+         prepare = lambda: syntheticPopulation(SPECIATION_GENES, size / 20)
+         seconds, exhaustive = speciationAgreement(prepare, None)
+         print "%-8d %-10s %10.3f" % (size, "off", seconds)
+         for bands, rows in MIN_HASH_SETTINGS:
+            seconds, species_of = speciationAgreement(prepare,
+                                                      (bands, rows))
+            differ = sum(species_of[place] != name
+                         for place, name in exhaustive.items())
+            print "%-8d %-10s %10.3f %9.2f%%" % (
+               size, "%dx%d" % (bands, rows), seconds,
+               100.0 * differ / exhaustive.__len__())
+   finally:
+      population.GENERATION_SIZE = generation_size
+
+def trackingGenome():
+   """
+   Make a genome that follows the ball with the paddle, so that an
+   episode lasts long enough to time.
+   """
+   genome1 = Genome(species.INPUTS, species.OUTPUTS, 0, 0)
+   # Node -3 is the first input, the ball's distance from the paddle,
+   # so the horizontal output is 1 - sigmoid(distance): below 0 moves
+   # right, above 0 moves left.  The bias also launches the ball.
+   for source, target, weight in [(0, MAX_LAYER + 1, 1 / sigmoid(1)),
+                                  (-3, MAX_LAYER + 1, -1),
+                                  (0, MAX_LAYER + 2, 1)]:
+      genome1.setGene(gene_index.getInnovation(source, target), source,
+                      target, weight)
+   return genome1
+
+def benchmarkEpisode(results):
+   """
+   Time a headless game of Breakout played by trackingGenome(), once
+   with step() and once with the run() generator.
+   """
+   brkout = breakout.Bricka(headless=True)
+   genome1 = trackingGenome()
+   genome1.generateNetwork()
+   activate = genome1.network.activateNetwork
+   frames = [0]
+
+   def play():
+      observation = brkout.reset()
+      frames[0] = 0
+      done = False
+      while not done and frames[0] < EPISODE_FRAMES:
+         observation, reward, done, info = brkout.step(activate(observation))
+         frames[0] += 1
+
+   def playGenerator():
+      brkout.init_game()
+      brkout.inputs = activate(brkout.observe())
+      frames[0] = 0
+      for item in brkout.run():
+         frames[0] += 1
+         if type(item) is not tuple or frames[0] == EPISODE_FRAMES:
+            break
+         brkout.inputs = activate(item)
+
+   results["Bricka.episode"] = timeCalls(play, 1, 5)
+   results["Bricka.episode"]["frames"] = frames[0]
+   results["Bricka.episode.run"] = timeCalls(playGenerator, 1, 5)
+   results["Bricka.episode.run"]["frames"] = frames[0]
+
+def gameState(brkout):
+   """Get everything about a game of Breakout that a frame can change."""
+   return (brkout.score, brkout.state, brkout.lives, tuple(brkout.paddle),
+           tuple(brkout.ball), tuple(brkout.ball_vel),
+           tuple(brkout.brick_exists), brkout.bricks_left)
+
+def skipIdleAgreement(genome1, skipping, stepping):
+   """
+   Play a genome's game twice in lockstep: once skipping idle frames the
+   way evaluateGenome() does, and once a frame at a time.  After every
+   skip, the game played a frame at a time plays the same number of
+   frames, and the two games have to be in exactly the same state.
+
+   Args:
+      genome1: the genome playing the games
+      skipping: a headless instance of the game breakout, which skips
+      stepping: another one, which doesn't
+
+   Returns:
+      frames: the number of frames played
+      skipped: how many of them were skipped
+      matches: True if the games were the same after every skip
+   """
+   network1 = genome1.network
+   activate = network1.activateNetwork
+   follows_ball = 0 in network1.outputsDependingOn(0)
+   observation = skipping.reset()
+   stepped_observation = stepping.reset()
+   frames = 0
+   skipped = 0
+   done = stepped_done = False
+   while not done:
+      action = activate(observation)
+      skip = skipping.skip_idle(action, follows_ball)
+      observation, reward, done, info = skipping.step(action)
+      for i in range(skip + 1):
+         if stepped_done:
+            return frames, skipped, False
+         stepped_observation, reward, stepped_done, info = \
+            stepping.step(activate(stepped_observation))
+      frames += skip + 1
+      skipped += skip
+      if gameState(skipping) != gameState(stepping) or \
+         done != stepped_done:
+         return frames, skipped, False
+   return frames, skipped, True
+
+def skipIdleReport(generations):
+   """
+   Check that skipping idle frames plays every game exactly the same
+   as playing it a frame at a time, for every genome of a population
+   evolved from SEED for some generations.  Each genome's fitness is
+   the score of its game.
+
+   Args:
+      generations: the number of generations to play
+
+   Returns:
+      mismatches: the number of games that didn't match
+   """
+   random.seed(SEED)
+   gene_index.__init__()
+   pool = population.Population()
+   skipping = breakout.Bricka(headless=True)
+   stepping = breakout.Bricka(headless=True)
+   mismatches = 0
+   print "%-10s %8s %10s %10s %10s" % ("generation", "games", "frames",
+                                       "skipped", "mismatches")
+   for generation in range(generations):
+      games = 0
+      total_frames = 0
+      total_skipped = 0
+      generation_mismatches = 0
+      for specie in pool.species.values():
+         for genome1 in specie.genomes.values():
+            frames, skipped, matches = skipIdleAgreement(genome1, skipping,
+                                                         stepping)
+            genome1.fitness = stepping.score
+            games += 1
+            total_frames += frames
+            total_skipped += skipped
+            if not matches:
+               generation_mismatches += 1
+      print "%-10d %8d %10d %10d %10d" % (generation, games, total_frames,
+                                          total_skipped,
+                                          generation_mismatches)
+      mismatches += generation_mismatches
+      pool.nextGeneration()
+   return mismatches
+
+def winLogReport(generations):
+   """
+   Evolve a population from WIN_SEED, playing every game the way the
+   driver does, until a genome clears a board.  Check that the batch
+   games agree with the serial ones on every (fitness, won) result, and
+   that evaluation.saveWin() saves the genome, and an action log of the
+   win with the same number that plays back with the same score.
+
+   Args:
+      generations: the most generations to play
+
+   Returns:
+      passed: True if a board was cleared, and every check passed
+   """
+   random.seed(WIN_SEED)
+   gene_index.__init__()
+   pool = population.Population()
+   brkout = breakout.Bricka(headless=True)
+   log_game = breakout.Bricka(headless=True)
+   for generation in range(generations):
+      genomes_list = evaluation.getGenomes(pool)
+      results = evaluation.playGenomes(genomes_list, brkout, skip_idle=True)
+      if evaluation.evaluateGenomesBatch(genomes_list) != results:
+         print "Generation", generation, ": batch games disagree"
+         return False
+      winners = [genome1 for genome1, (fitness, won)
+                 in zip(genomes_list, results) if won]
+      print "Generation", generation, ":", winners.__len__(), \
+            "genomes cleared a board"
+      for genome1, (fitness, won) in zip(genomes_list, results):
+         genome1.fitness = fitness
+      if winners:
+         break
+      pool.nextGeneration()
+   else:
+      print "No genome cleared a board"
+      return False
+
+   # saveWin() writes to the current directory
+   directory = os.getcwd()
+   os.chdir(tempfile.mkdtemp())
+   try:
+      evaluation.saveWin(winners[0], winners[0].getNetworkKey(),
+                         winners[0].fitness, {}, log_game, WIN_SEED,
+                         generation)
+      if not os.path.exists("winning_game.1"):
+         print "No action log was written"
+         return False
+      log = actionLog.load("winning_game.1")
+      if not os.path.exists("winning_genome.1"):
+         print "No genome was saved with the action log"
+         return False
+      saved = Genome(0, 0, 0, 0)
+      saved.load("winning_genome.1")
+      if saved.getNetworkKey() != log.fingerprint:
+         print "The genome saved is not the one that was logged"
+         return False
+   finally:
+      os.chdir(directory)
+   matches = actionLog.verify(log)
+   print "%d frames logged, score %d %s" % \
+         (log.__len__(), log.score,
+          "matches" if matches else "does NOT match")
+   return matches
+
+def runSuite():
+   """
+   Run every benchmark.
+
+   Returns:
+      report: a dictionary that can be saved as JSON
+   """
+   results = {}
+   for num_genes in GENE_COUNTS:
+      benchmarkGenomes(results, num_genes)
+   for num_genes in GENE_COUNTS:
+      benchmarkPopulation(results, num_genes)
+   for size in SPECIATION_SIZES:
+      benchmarkSpeciation(results, size)
+   benchmarkEpisode(results)
+   return {"version": 1,
+           "seed": SEED,
+           "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+           "python": platform.python_version(),
+           "platform": platform.platform(),
+           "results": results}
+
+def compare(old_report, new_report, threshold):
+   """
+   Compare two reports, printing how each benchmark changed.
+
+   Args:
+      old_report: the report from before
+      new_report: the report from after
+      threshold: how much slower, as a fraction, counts as a regression
+
+   Returns:
+      regressions: the names of the benchmarks that got slower
+   """
+   old_results = old_report["results"]
+   new_results = new_report["results"]
+   regressions = []
+   print "%-45s %12s %12s %8s" % ("benchmark", "before (us)", "after (us)",
+                                  "change")
+   for name in sorted(set(old_results) | set(new_results)):
+      if name not in old_results or name not in new_results:
+         print "%-45s only in one report" % name
+         continue
+      before = old_results[name]["best"]
+      after = new_results[name]["best"]
+      change = after / before - 1
+      flag = ""
+      if change > threshold:
+         flag = "  REGRESSION"
+         regressions.append(name)
+      print "%-45s %12.1f %12.1f %+7.1f%%%s" % (name, before * 1e6,
+                                                after * 1e6, change * 100,
+                                                flag)
+   return regressions
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser(description="Benchmark the NEAT system.")
+   commands = parser.add_subparsers(dest="command")
+   run_parser = commands.add_parser("run", help="run the benchmarks")
+   run_parser.add_argument("--output", default="benchmark.json",
+                           help="file to save the results to")
+   compare_parser = commands.add_parser("compare",
+                                        help="compare two saved runs")
+   compare_parser.add_argument("before")
+   compare_parser.add_argument("after")
+   compare_parser.add_argument("--threshold", type=float, default=0.1,
+                               help="fraction slower that counts as a "
+                                    "regression (default: 0.1)")
+   commands.add_parser("speciation",
+                       help="compare MinHash speciation with checking "
+                            "every representative")
+   skip_parser = commands.add_parser("skip-idle",
+                                     help="check that skipping idle frames "
+                                          "plays every game the same")
+   skip_parser.add_argument("--generations", type=int, default=3,
+                            help="number of generations to play "
+                                 "(default: 3)")
+   win_parser = commands.add_parser("win-log",
+                                    help="check that a genome clearing a "
+                                         "board gets an action log")
+   win_parser.add_argument("--generations", type=int, default=20,
+                           help="most generations to play (default: 20)")
+   args = parser.parse_args()
+
+   if args.command == "run":
+      report = runSuite()
+      with open(args.output, "w") as f:
+         json.dump(report, f, indent=1, sort_keys=True)
+      for name, result in sorted(report["results"].items()):
+         print "%-45s %12.1f us" % (name, result["best"] * 1e6)
+   elif args.command == "speciation":
+      speciationReport()
+   elif args.command == "skip-idle":
+      if skipIdleReport(args.generations):
+         sys.exit(1)
+   elif args.command == "win-log":
+      if not winLogReport(args.generations):
+         sys.exit(1)
+   else:
+      with open(args.before) as f:
+         old_report = json.load(f)
+      with open(args.after) as f:
+         new_report = json.load(f)
+      if compare(old_report, new_report, args.threshold):
+         sys.exit(1)
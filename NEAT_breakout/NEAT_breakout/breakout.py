@@ -11,6 +11,7 @@
  hit.  Also, the score decreases with each frame so that the
  program will time out if the paddle doesn't launch the ball.
 """
+import math
 import sys
 import pygame
 import random
@@ -47,6 +48,12 @@ MIN_BALL_SPEED = 30
 # starting score
 POINTS = 300
 
+# the brick wall is BRICK_ROWS rows of BRICK_COLUMNS bricks, starting
+# WALL_TOP pixels from the top of the screen
+BRICK_ROWS = 7
+BRICK_COLUMNS = 10
+WALL_TOP = 35
+
 # boundaries
 MAX_PADDLE_X = SCREEN_SIZE[0] - PADDLE_WIDTH
 MAX_BALL_X   = SCREEN_SIZE[0] - BALL_DIAMETER
@@ -67,21 +74,60 @@ STATE_PLAYING = 1
 STATE_WON = 2
 STATE_GAME_OVER = 3
 
+def straight_frames(position, step, spaces):
+    """
+    Count the frames something moving step pixels a frame stays inside
+    one of some spaces, starting from the next frame.
+
+    Args:
+       position: where it is now
+       step: how far it moves each frame
+       spaces: a list of (lowest, highest) positions it may be in
+
+    Returns:
+       frames: the number of frames, which is 0 if it leaves the spaces
+       on the next frame, and sys.maxint if it never leaves
+    """
+    next_position = position + step
+    for lowest, highest in spaces:
+        if lowest <= next_position <= highest:
+            if step > 0:
+                return (highest - position) // step
+            elif step < 0:
+                return (position - lowest) // -step
+            return sys.maxint
+    return 0
+
 class Bricka:
     """A game of Breakout."""
-    def __init__(self):
-        """Initialize the pygame module."""
-        pygame.init()
+    def __init__(self, headless = False):
+        """
+        Initialize the pygame module.
+
+        Args:
+           headless: if True, no window is opened, the frame rate is not
+           capped, and nothing is drawn.  The game itself plays exactly
+           the same, so this is the mode to use for training.
+        """
+        self.headless = headless
         self.inputs = [0,0,0]
-        self.screen = pygame.display.set_mode(SCREEN_SIZE)
-        pygame.display.set_caption("bricka")
+        if headless:
+            # pygame.Rect is all the physics needs, so we never touch
+            # the display and can run on a machine without one.
+            self.screen = None
+            self.clock = None
+            self.font = None
+        else:
+            pygame.init()
+            self.screen = pygame.display.set_mode(SCREEN_SIZE)
+            pygame.display.set_caption("bricka")
 
-        self.clock = pygame.time.Clock()
+            self.clock = pygame.time.Clock()
 
-        if pygame.font:
-            self.font = pygame.font.Font(None,30)
-        else:
-            self.font = None
+            if pygame.font:
+                self.font = pygame.font.Font(None,30)
+            else:
+                self.font = None
 
         self.init_game()
         self.state = STATE_GAME_OVER
@@ -103,23 +149,53 @@ class Bricka:
 
 
     def create_bricks(self):
-        """Create the bricks in the Breakout game."""
-        y_ofs = 35
+        """
+        Create the bricks in the Breakout game.  The wall never moves,
+        so self.bricks always holds every brick, a row at a time, and
+        self.brick_exists says which of them are still standing.
+        """
+        y_ofs = WALL_TOP
         self.bricks = []
         self.brick_exists = []
-        for i in range(7):
+        for i in range(BRICK_ROWS):
             x_ofs = 0
-            for j in range(10):
+            for j in range(BRICK_COLUMNS):
                 self.bricks.append(pygame.Rect(x_ofs,y_ofs,
                                                BRICK_WIDTH,BRICK_HEIGHT))
                 self.brick_exists.append(1)
                 x_ofs += BRICK_WIDTH
             y_ofs += BRICK_HEIGHT
+        self.bricks_left = len(self.bricks)
 
     def draw_bricks(self):
         """Draw the bricks in the Breakout game."""
-        for brick in self.bricks:
-            pygame.draw.rect(self.screen, BRICK_COLOR, brick)
+        for brick, exists in zip(self.bricks, self.brick_exists):
+            if exists:
+                pygame.draw.rect(self.screen, BRICK_COLOR, brick)
+
+    def find_brick(self):
+        """
+        Find the first standing brick the ball overlaps, in the order of
+        self.bricks.  Only the few bricks under the ball are checked:
+        its position gives the rows and columns it can overlap.
+
+        Returns:
+           the index of the brick in self.bricks, or None
+        """
+        top = self.ball.top
+        first_row = max(0, (top - WALL_TOP) // BRICK_HEIGHT)
+        last_row = min(BRICK_ROWS - 1,
+                       (top + BALL_DIAMETER - 1 - WALL_TOP) // BRICK_HEIGHT)
+        left = self.ball.left
+        first_column = max(0, left // BRICK_WIDTH)
+        last_column = min(BRICK_COLUMNS - 1,
+                          (left + BALL_DIAMETER - 1) // BRICK_WIDTH)
+        brick_exists = self.brick_exists
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                if brick_exists[row * BRICK_COLUMNS + column]:
+                    return row * BRICK_COLUMNS + column
+        return None
 
     def check_input(self):
         """Check the input coming from the computer."""
@@ -168,16 +244,14 @@ class Bricka:
         make a "glancing blow" give a different angle than a "direct hit."
         I also made it so that the ball speeds up over time.
         """
-        for brick in self.bricks:
-            if self.ball.colliderect(brick):
-                self.score += POINTS
-                self.ball_vel[1] = -self.ball_vel[1]
-                self.brick_exists[self.bricks.index(brick)] = 0
-                self.bricks.remove(brick)
-                
-                break
-
-        if len(self.bricks) == 0:
+        brick = self.find_brick()
+        if brick != None:
+            self.score += POINTS
+            self.ball_vel[1] = -self.ball_vel[1]
+            self.brick_exists[brick] = 0
+            self.bricks_left -= 1
+
+        if self.bricks_left == 0:
             self.state = STATE_WON
 
         if self.ball.colliderect(self.paddle):
@@ -219,12 +293,201 @@ class Bricka:
                                             False, WHITE)
             self.screen.blit(font_surface, (255,5))
 
+    def draw(self):
+        """Draw the bricks, paddle, ball and score to the screen."""
+        self.draw_bricks()
+
+        # Draw paddle
+        pygame.draw.rect(self.screen, BLUE, self.paddle)
+
+        # Draw ball
+        pygame.draw.circle(self.screen, WHITE, 
+                           (self.ball.left + BALL_RADIUS,
+                            self.ball.top + BALL_RADIUS), 
+                            BALL_RADIUS)
+
+        self.show_stats()
+        
+        pygame.display.flip()
+
+    def observe(self):
+        """
+        Get what the computer player can see of the game.
+
+        Returns:
+           a tuple containing the relative x distance from the ball to the
+           paddle, the x velocity of the ball, and the y velocity of the 
+           ball.
+        """
+        bx, by = self.ball.center
+        px, py = self.paddle.center
+        return ((bx - px)/float(SCREEN_WIDTH), \
+                self.ball_vel[0] / 100., \
+                self.ball_vel[1] / 100., \
+                )
+
+    def reset(self):
+        """
+        Start a new game.
+
+        Returns:
+           observation: what the computer player can see, see observe()
+        """
+        self.done = False
+        self.init_game()
+        return self.observe()
+
+    def step(self, action):
+        """
+        Play one frame of the game.
+
+        The game is over once the ball is missed, once the board is
+        cleared, or once the score reaches -100.  After that, call
+        reset() to start a new one.
+
+        Args:
+           action: the joystick values, the same as self.inputs
+
+        Returns:
+           observation: what the computer player can see, see observe()
+           reward: how much the score changed during the frame
+           done: True if the game is over or the window was closed
+           info: a dictionary with the score and the state of the game,
+           "won" set to True if the board was cleared, and
+           "closed" set to True if the window was closed
+        """
+        self.inputs = action
+        start_score = self.score
+        if not self.headless:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.state = STATE_GAME_OVER
+                    self.done = True
+                    return self.observe(), 0, True, \
+                           {"score": self.score, "state": self.state,
+                            "won": False, "closed": True}
+            self.clock.tick(50)
+        self.score -= 1
+        if not self.headless:
+            self.screen.fill(BLACK)
+        self.check_input()
+
+        # the game is over the frame after the ball is missed
+        done = self.state == STATE_GAME_OVER
+        won = False
+        if self.state == STATE_PLAYING:
+            self.move_ball()
+            self.handle_collisions()
+            # clearing the board ends the game, or a player that never
+            # misses would play forever
+            won = self.bricks_left == 0
+        elif self.state == STATE_BALL_IN_PADDLE:
+            self.ball.left = self.paddle.left + self.paddle.width / 2
+            self.ball.top  = self.paddle.top - self.ball.height
+        if not self.headless:
+            self.draw()
+
+        if self.score <= -100 or won:
+            done = True
+        return self.observe(), self.score - start_score, done, \
+               {"score": self.score, "state": self.state, "won": won,
+                "closed": False}
+
+    def skip_idle(self, action, follows_ball = True):
+        """
+        Play every upcoming frame that is certain to be idle all at once.
+        In an idle frame the ball only moves in a straight line, nothing
+        is hit, and the action can't change.  The frame with the next
+        event is left for step().  Only headless games skip frames.
+
+        The action can't change while the ball sits on the paddle
+        without being launched, because the computer player sees the
+        same thing every frame.  While the ball is flying, the action
+        can only change if it depends on how far the ball is from the
+        paddle, since the ball's velocity only changes at an event.
+
+        Args:
+           action: the joystick values for the current observation
+           follows_ball: False if the horizontal joystick value doesn't
+           depend on the ball's distance from the paddle
+
+        Returns:
+           frames: the number of frames played
+        """
+        if not self.headless:
+            return 0
+        # the frame that times out the game is not idle
+        frames = self.score + 99
+        step_x = step_y = 0
+        if self.state == STATE_BALL_IN_PADDLE:
+            if action[1] > SPACE_THRESHOLD \
+                or self.ball.left != self.paddle.left + self.paddle.width / 2 \
+                or self.ball.top != self.paddle.top - self.ball.height:
+                return 0
+        elif self.state == STATE_PLAYING and not follows_ball:
+            flight, step_x, step_y = self.flight_frames()
+            frames = min(frames, flight)
+        else:
+            return 0
+        if frames <= 0:
+            return 0
+
+        # the paddle moves the same way every frame
+        if action[0] >= LEFT_THRESHOLD:
+            self.paddle.left = max(0, self.paddle.left - frames * PADDLE_SPEED)
+        elif action[0] <= RIGHT_THRESHOLD:
+            self.paddle.left = min(MAX_PADDLE_X,
+                                   self.paddle.left + frames * PADDLE_SPEED)
+        if self.state == STATE_BALL_IN_PADDLE:
+            self.ball.left = self.paddle.left + self.paddle.width / 2
+        else:
+            self.ball.left += frames * step_x
+            self.ball.top += frames * step_y
+        self.score -= frames
+        return frames
+
+    def flight_frames(self):
+        """
+        Count the frames the ball is certain to fly in a straight line
+        without reaching a wall, a row with bricks in it, or the paddle.
+
+        Returns:
+           frames: the number of frames
+           step_x: how far the ball moves right each frame
+           step_y: how far the ball moves down each frame
+        """
+        # The ball's rect drops the fraction of its position, so it
+        # moves the whole part of its velocity each frame.  A fraction
+        # close enough to 1 could be rounded up instead, so we don't try.
+        step_x = int(math.floor(self.ball_vel[0]))
+        step_y = int(math.floor(self.ball_vel[1]))
+        if self.ball_vel[0] - step_x > 1 - 1e-9 \
+            or self.ball_vel[1] - step_y > 1 - 1e-9:
+            return 0, 0, 0
+
+        # the rows that still have bricks
+        rows = [row for row in range(BRICK_ROWS)
+                if 1 in self.brick_exists[row * BRICK_COLUMNS:
+                                          (row + 1) * BRICK_COLUMNS]]
+        wall_top = WALL_TOP + rows[0] * BRICK_HEIGHT
+        wall_bottom = WALL_TOP + (rows[-1] + 1) * BRICK_HEIGHT
+
+        # the ball can fly above the wall or between it and the paddle
+        frames_x = straight_frames(self.ball.left, step_x,
+                                   [(1, MAX_BALL_X - 1)])
+        frames_y = straight_frames(self.ball.top, step_y,
+                                   [(0, wall_top - BALL_DIAMETER),
+                                    (wall_bottom, PADDLE_Y - BALL_DIAMETER)])
+        return min(frames_x, frames_y), step_x, step_y
+
     def run(self):
         """
         Run the Breakout game.
         
         This is a special generator function that is used to return
         the positions of the ball and paddle while the game is playing.
+        It plays the game with step(), using self.inputs as the action,
+        and starts a new game whenever one is over.
 
         Yields:
            None: when the simulation is over
@@ -235,52 +498,17 @@ class Bricka:
            the next immediate action.
         """
         self.done = False
-        while not self.done:            
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.state = STATE_GAME_OVER
-                    self.done = True
-                    yield None
-            self.clock.tick(50)
-            self.score -= 1
-            self.screen.fill(BLACK)
-            self.check_input()
-
-            if self.state == STATE_PLAYING:
-                self.move_ball()
-                self.handle_collisions()
-            elif self.state == STATE_GAME_OVER:
+        while not self.done:
+            observation, reward, done, info = self.step(self.inputs)
+            if self.done:
+                yield None
+            elif done:
                 yield self.score
                 self.init_game()
-            elif self.state == STATE_BALL_IN_PADDLE:
-                self.ball.left = self.paddle.left + self.paddle.width / 2
-                self.ball.top  = self.paddle.top - self.ball.height
-            elif self.state == STATE_WON:
-                yield None
-            self.draw_bricks()
-
-            # Draw paddle
-            pygame.draw.rect(self.screen, BLUE, self.paddle)
-
-            # Draw ball
-            pygame.draw.circle(self.screen, WHITE, 
-                               (self.ball.left + BALL_RADIUS,
-                                self.ball.top + BALL_RADIUS), 
-                                BALL_RADIUS)
-
-            self.show_stats()
-            
-            pygame.display.flip()
-            
-            if self.score <= -100:
-               yield self.score
-               self.init_game()
-            bx, by = self.ball.center
-            px, py = self.paddle.center
-            yield ((bx - px)/float(SCREEN_WIDTH), \
-                   self.ball_vel[0] / 100., \
-                   self.ball_vel[1] / 100., \
-                   )
+                yield self.observe()
+            else:
+                yield observation
+
 if __name__ == "__main__":
     Bricka().run()
     pygame.quit()
\ No newline at end of file
@@ -0,0 +1,273 @@
+"""
+checkpoint.py
+Author: James Richter
+Class: CS 499, Twitchell/Burton
+Last Updated: 10/18/2026
+
+Saves and loads the whole state of a training run, so that a run that
+dies can be picked up again where it left off.
+
+A checkpoint holds the generation number, every species with its
+staleness and average fitness, every genome with its genes, nodes and
+fitness, the gene_index of innovations, how an island renumbered other
+islands' innovations, and the state of the random number generator.  A
+run resumed from a checkpoint carries on exactly as it would have if it
+had never stopped.
+
+The file is a header followed by little-endian numbers and arrays,
+in this order:
+
+   "NEATCKPT", version
+   generation, total average fitness
+   random state: version, 625 state words, gauss flag, gauss value
+   gene_index: number of innovations, (source, target) of each one
+   number of species, and for each species:
+      name, staleness, average fitness, number of genomes
+      for each genome:
+         key, name (-1 for None), species, fitness, inputs, outputs,
+         number of genes, number of nodes,
+         innovations, sources, targets, weights, enabled, nodes
+   number of translations, (island, innovation, innovation) of each one
+
+Fitness is a double, so any score can be saved.  Version 1 saved it as
+a whole number, and versions before 3 had no translations.  They can
+still be loaded.
+
+Species and genomes are written in the order their dictionaries list
+them, and loaded back in the same order.
+"""
+
+import population
+import species
+from genome import Genome
+from geneIndex import gene_index
+
+from array import array
+import os
+import pickle
+import random
+import struct
+import sys
+import time
+
+MAGIC = "NEATCKPT"
+VERSION = 3
+
+HEADER = struct.Struct("<8sI")
+POPULATION = struct.Struct("<qd")
+RANDOM_STATE = struct.Struct("<i625IBd")
+COUNT = struct.Struct("<I")
+SPECIES = struct.Struct("<iidI")
+GENOME = struct.Struct("<iiidBBII")
+# version 1 saved fitness as a whole number
+GENOME_VERSION_1 = struct.Struct("<iiiqBBII")
+
+def packArray(typecode, values):
+   """Get the bytes of an array of values, in little-endian order."""
+   values = array(typecode, values)
+   if sys.byteorder == "big":
+      values.byteswap()
+   return values.tostring()
+
+def save(filename, pool):
+   """
+   Save a checkpoint of a training run.  The checkpoint is written to
+   a temporary file first, then moved over filename, so a run that dies
+   while saving leaves the last checkpoint alone.
+
+   Args:
+      filename: the file to save to
+      pool: the population being trained
+   """
+   chunks = [HEADER.pack(MAGIC, VERSION),
+             POPULATION.pack(pool.generation, pool.total_average_fitness)]
+
+   version, state, gauss = random.getstate()
+   chunks.append(RANDOM_STATE.pack(version, *(state + (gauss != None,
+                                                       gauss or 0.0))))
+
+   chunks.append(COUNT.pack(gene_index.__len__()))
+   chunks.append(packArray('i', [node
+                                 for connection in gene_index.connections
+                                 for node in connection]))
+
+   chunks.append(COUNT.pack(pool.species.__len__()))
+   for name, specie in pool.species.items():
+      chunks.append(SPECIES.pack(name, specie.staleness,
+                                 specie.average_fitness,
+                                 specie.genomes.__len__()))
+      for key, genome1 in specie.genomes.items():
+         genome_name = genome1.name
+         if genome_name == None:
+            genome_name = -1
+         chunks.append(GENOME.pack(key, genome_name, genome1.species,
+                                   genome1.fitness, genome1.num_inputs,
+                                   genome1.num_outputs,
+                                   genome1.innovations.__len__(),
+                                   genome1.nodes.__len__()))
+         chunks.append(packArray('i', genome1.innovations))
+         chunks.append(packArray('i', genome1.sources))
+         chunks.append(packArray('i', genome1.targets))
+         chunks.append(packArray('d', genome1.weights))
+         chunks.append(packArray('b', genome1.enabled))
+         chunks.append(packArray('i', genome1.nodes))
+
+   chunks.append(COUNT.pack(pool.translation.__len__()))
+   chunks.append(packArray('i', [number
+                                 for (island, innovation), local
+                                 in sorted(pool.translation.items())
+                                 for number in (island, innovation, local)]))
+
+   temp_filename = filename + ".tmp"
+   with open(temp_filename, "wb") as f:
+      f.write("".join(chunks))
+      f.flush()
+      os.fsync(f.fileno())
+   # Windows won't rename over a file that exists
+   if os.name == "nt" and os.path.exists(filename):
+      os.remove(filename)
+   os.rename(temp_filename, filename)
+
+class Reader:
+   """Reads numbers and arrays out of the bytes of a checkpoint."""
+   def __init__(self, data):
+      self.data = data
+      self.offset = 0
+
+   def read(self, structure):
+      """Read the values of a struct.Struct."""
+      values = structure.unpack_from(self.data, self.offset)
+      self.offset += structure.size
+      return values
+
+   def readArray(self, typecode, count):
+      """Read an array of count values."""
+      values = array(typecode)
+      end = self.offset + values.itemsize * count
+      if end > self.data.__len__():
+         raise ValueError("checkpoint is cut short")
+      values.fromstring(self.data[self.offset:end])
+      if sys.byteorder == "big":
+         values.byteswap()
+      self.offset = end
+      return values
+
+def load(filename):
+   """
+   Load a checkpoint of a training run.  This also puts gene_index and
+   the random number generator back the way they were.
+
+   Args:
+      filename: the file to load from
+
+   Returns:
+      pool: the population being trained
+   """
+   with open(filename, "rb") as f:
+      reader = Reader(f.read())
+   try:
+      magic, version = reader.read(HEADER)
+   except struct.error:
+      raise ValueError(filename + " is not a checkpoint")
+   if magic != MAGIC:
+      raise ValueError(filename + " is not a checkpoint")
+   if version < 1 or version > VERSION:
+      raise ValueError(filename + " is checkpoint version " + str(version) +
+                       ", but only versions up to " + str(VERSION) +
+                       " can be read")
+
+   try:
+      return readPopulation(reader, version)
+   except struct.error:
+      raise ValueError("checkpoint is cut short")
+
+def readPopulation(reader, version = VERSION):
+   """
+   Read the rest of a checkpoint, after the header.
+
+   Args:
+      reader: the Reader
+      version: the version of the checkpoint
+   """
+   genome_struct = GENOME
+   if version == 1:
+      genome_struct = GENOME_VERSION_1
+   generation, total_average_fitness = reader.read(POPULATION)
+
+   values = reader.read(RANDOM_STATE)
+   random_state = (values[0], values[1:626],
+                   values[627] if values[626] else None)
+
+   number_innovations, = reader.read(COUNT)
+   innovation_nodes = reader.readArray('i', 2 * number_innovations)
+
+   species_list = []
+   number_species, = reader.read(COUNT)
+   for i in range(number_species):
+      name, staleness, average_fitness, number_genomes = \
+         reader.read(SPECIES)
+      specie = species.Species(name, generate=False)
+      specie.staleness = staleness
+      specie.average_fitness = average_fitness
+      for j in range(number_genomes):
+         key, genome_name, genome_species, fitness, num_inputs, \
+            num_outputs, number_genes, number_nodes = \
+            reader.read(genome_struct)
+         if genome_name == -1:
+            genome_name = None
+         genome1 = Genome(num_inputs, num_outputs, genome_species,
+                          genome_name)
+         genome1.fitness = fitness
+         genome1.innovations = reader.readArray('i', number_genes)
+         genome1.sources = reader.readArray('i', number_genes)
+         genome1.targets = reader.readArray('i', number_genes)
+         genome1.weights = reader.readArray('d', number_genes)
+         genome1.enabled = reader.readArray('b', number_genes)
+         genome1.nodes = set(reader.readArray('i', number_nodes))
+         specie.genomes[key] = genome1
+      species_list.append(specie)
+
+   translation = {}
+   if version >= 3:
+      number_translations, = reader.read(COUNT)
+      numbers = reader.readArray('i', 3 * number_translations)
+      for i in range(0, numbers.__len__(), 3):
+         translation[(numbers[i], numbers[i + 1])] = numbers[i + 2]
+
+   pool = population.Population(species_list=species_list)
+   pool.generation = generation
+   pool.total_average_fitness = total_average_fitness
+   pool.translation = translation
+   gene_index.__init__()
+   for i in range(number_innovations):
+      gene_index.addInnovation(innovation_nodes[2 * i],
+                               innovation_nodes[2 * i + 1])
+   random.setstate(random_state)
+   return pool
+
+if __name__ == "__main__":
+   # time saving and loading a population a few generations in, and
+   # compare the size with pickling it
+   random.seed(0)
+   pool = population.Population()
+   for generation in range(5):
+      for _, specie in pool.species.items():
+         for _, genome1 in specie.genomes.items():
+            genome1.fitness = random.randint(-100, 2000)
+      pool.nextGeneration()
+   number_genomes = sum(specie.genomes.__len__()
+                        for _, specie in pool.species.items())
+
+   start_time = time.time()
+   save("checkpoint_test", pool)
+   save_time = time.time() - start_time
+   start_time = time.time()
+   load("checkpoint_test")
+   load_time = time.time() - start_time
+   size = os.path.getsize("checkpoint_test")
+   pickle_size = pickle.dumps(pool, 2).__len__()
+   os.remove("checkpoint_test")
+   print "%d genomes: saved in %.1f ms, loaded in %.1f ms, %.1f KB " \
+         "(%.1f KB pickled)" % (number_genomes, save_time * 1000,
+                                load_time * 1000, size / 1024.,
+                                pickle_size / 1024.)
@@ -12,66 +12,215 @@ import breakout
 import genome
 import species
 import population
+import fitnessCache
+import checkpoint
+import spectator
+import islands
+import reproduction
+import steadyState
+from evaluation import getGenomes, initWorker, saveWin, scoreGenomes
+from timing import timings
 
+import argparse
 import itertools
+import multiprocessing
+import random
 import time
 import os.path
 
-def runBreakout(pool, brkout):
+def runBreakout(pool, brkout, workers = 1, batch = False,
+                cache_size = fitnessCache.DEFAULT_SIZE,
+                checkpoint_file = None, timings_file = None,
+                skip_idle = False, seed = None, spectate = None):
    """
    Run the Breakout game.
 
    Args:
       pool: a pool of species that contains all of our genomes and NEAT logic
-      breakout: an instance of the game breakout
+      breakout: an instance of the game breakout, used when workers is 1
+      workers: the number of processes that play games at the same time
+      batch: if True, play every game at once with batchBreakout
+      cache_size: the number of fitness results to remember, so that
+      copies of a genome don't play the same game again
+      checkpoint_file: if given, the whole population is saved to this
+      file at the start of every generation
+      timings_file: if given, a line of JSON with the time spent in each
+      phase of the generation is added to this file every generation
+      skip_idle: if True, headless games skip their idle frames
+      seed: the random seed the run started from, which is saved with
+      the action log of every winning game
+      spectate: "best" or "random" to open a spectator window that
+      plays the best genome, or a random one, from every generation
    """
 
    start_time = time.time()
-   genomes_list = []
-   for _,species in pool.species.items():
-      for i,genome1 in species.genomes.items():
-         genomes_list.append(genome1)
-   current_genome = 0
+   timings.enabled = timings_file != None
+   process_pool = None
+   if workers > 1:
+      process_pool = multiprocessing.Pool(workers, initializer=initWorker,
+                                          initargs=(timings.enabled,
+                                                    skip_idle))
+   watcher = None
+   if spectate:
+      watcher = spectator.Spectator(spectate)
+   cache = fitnessCache.FitnessCache(cache_size)
+   # the wins that have been saved
+   logged = {}
+   log_game = breakout.Bricka(headless=True)
 
-   print "Generation:", pool.generation
-   genomes_list[0].generateNetwork()
+   try:
+      while True:
+         if checkpoint_file:
+            checkpoint.save(checkpoint_file, pool)
+         genomes_list = getGenomes(pool)
+         print "Generation:", pool.generation
+         timings.reset()
+         generation_start_time = time.time()
+
+         # look up every genome in the cache, and only play one game for
+         # each network we haven't seen before
+         cache.resetCounts()
+         keys = [genome1.getNetworkKey() for genome1 in genomes_list]
+         results = scoreGenomes(genomes_list, keys, cache, brkout,
+                                process_pool, batch, skip_idle)
+         if results == None:
+            return
+
+         for current_genome, (fitness, won) in enumerate(results):
+            if won:
+               saveWin(genomes_list[current_genome], keys[current_genome],
+                       fitness, logged, log_game, seed, pool.generation)
+            genomes_list[current_genome].fitness = fitness
+            print "Species ", genomes_list[current_genome].species, ":", \
+                  "Genome " , current_genome, ":", \
+                  "Fitness ", fitness
+         print "Fitness cache:", cache.hits, "hits,", cache.misses, "misses"
+         if watcher:
+            watcher.show(genomes_list, pool.generation)
 
-   # run the breakout game
-   for item in brkout.run():
-      # plug in the game outputs into the neural network
-      try:
-         game_coords = [x for x in item]
-         inputs = genomes_list[current_genome].activateNetwork(game_coords)
-         inputs = [i for _,i in inputs.items()]
-         brkout.inputs = inputs
-      # start a new game
-      except:
-         if item == None and brkout.state == breakout.STATE_WON:
-            genomes_list[current_genome].save("winning_genome")
-         genomes_list[current_genome].fitness = item
-         print "Species ", genomes_list[current_genome].species, ":", \
-               "Genome " , current_genome, ":", \
-               "Fitness ", item
-         current_genome += 1
-         # move to the next genome
-         if current_genome < genomes_list.__len__():
-            genomes_list[current_genome].generateNetwork()
          # get a new generation
-         else:
-            current_genome = 0
-            pool.nextGeneration()
-            print "Generation", pool.generation - 1, \
-               "had an average fitness of", pool.total_average_fitness
-            print "Generation:", pool.generation
-            genomes_list = []
-            for _,species in pool.species.items():
-               for i,genome1 in species.genomes.items():
-                  genomes_list.append(genome1)
-            current_genome = 0
-            genomes_list[current_genome].generateNetwork()
-         brkout.score = 0
+         pool.nextGeneration()
+         print "Generation", pool.generation - 1, \
+            "had an average fitness of", pool.total_average_fitness
+
+         if timings_file:
+            timings.write(timings_file, generation=pool.generation - 1,
+                          population=genomes_list.__len__(),
+                          played=cache.misses,
+                          cache_hits=cache.hits, cache_misses=cache.misses,
+                          seconds=time.time() - generation_start_time)
+   finally:
+      if process_pool:
+         process_pool.terminate()
+      if watcher:
+         watcher.close()
 
-pool = population.Population()
-brkout = breakout.Bricka()
+if __name__ == "__main__":
+   multiprocessing.freeze_support()
+   parser = argparse.ArgumentParser(description="Train NEAT on Breakout.")
+   parser.add_argument("--headless", action="store_true",
+                       help="train without a window or frame rate cap")
+   parser.add_argument("--workers", type=int, default=1,
+                       help="number of processes evaluating genomes "
+                            "(more than 1 implies --headless)")
+   parser.add_argument("--batch", action="store_true",
+                       help="play the whole generation at once with NumPy "
+                            "(implies --headless)")
+   parser.add_argument("--spectate", choices=["best", "random"],
+                       help="watch the best genome, or a random one, of "
+                            "every generation in a window of its own "
+                            "(implies --headless)")
+   parser.add_argument("--steady-state", action="store_true",
+                       help="breed a child whenever a game ends, instead "
+                            "of a generation at a time")
+   parser.add_argument("--islands", type=int, default=1,
+                       help="number of populations, each evolving in a "
+                            "process of its own and swapping their best "
+                            "genomes now and then (implies --headless)")
+   parser.add_argument("--migration-interval", type=int,
+                       default=islands.MIGRATION_INTERVAL,
+                       help="generations between an island sending its "
+                            "best genomes to the next one (default: %d)"
+                            % islands.MIGRATION_INTERVAL)
+   parser.add_argument("--migrants", type=int, default=islands.MIGRANTS,
+                       help="number of genomes an island sends (default: "
+                            "%d)" % islands.MIGRANTS)
+   parser.add_argument("--mating-workers", type=int, metavar="N",
+                       help="mate the species on N processes, with a "
+                            "result that is the same for any N")
+   parser.add_argument("--skip-idle", action="store_true",
+                       help="play the frames where nothing can happen all "
+                            "at once (headless only, not with --batch)")
+   parser.add_argument("--cache-size", type=int,
+                       default=fitnessCache.DEFAULT_SIZE,
+                       help="number of genome fitnesses to remember, so "
+                            "that copies of a genome are not played again "
+                            "(0 turns the cache off)")
+   parser.add_argument("--checkpoint", default="checkpoint",
+                       help="file the population is saved to at the start "
+                            "of every generation (default: checkpoint)")
+   parser.add_argument("--timings", metavar="FILE",
+                       help="add a line of JSON with where the time went "
+                            "to FILE every generation")
+   parser.add_argument("--resume", action="store_true",
+                       help="carry on the run saved in the checkpoint file")
+   parser.add_argument("--min-hash", type=int, nargs=2,
+                       metavar=("BANDS", "ROWS"),
+                       help="only check each genome against the species a "
+                            "MinHash index finds for it, which is faster "
+                            "with many species but can miss a match")
+   parser.add_argument("--seed", type=int,
+                       help="random seed to start the run from (default: "
+                            "a random one, which is printed)")
+   args = parser.parse_args()
+   if args.islands > 1 and (args.workers > 1 or args.batch or
+                            args.spectate or args.timings or
+                            args.steady_state):
+      parser.error("--islands can't be used with --workers, --batch, "
+                   "--spectate, --timings or --steady-state")
+   if args.steady_state and (args.batch or args.timings):
+      parser.error("--steady-state can't be used with --batch or --timings")
+   if args.mating_workers and (args.islands > 1 or args.steady_state):
+      parser.error("--mating-workers can't be used with --islands or "
+                   "--steady-state")
+   min_hash = None
+   if args.min_hash:
+      min_hash = tuple(args.min_hash)
 
-runBreakout(pool, brkout)
\ No newline at end of file
+   seed = None
+   if not args.resume:
+      seed = args.seed
+      if seed == None:
+         seed = random.randrange(2 ** 31)
+      print "Seed:", seed
+
+   if args.islands > 1:
+      islands.runIslands(args.islands, seed, args.migration_interval,
+                         args.migrants, args.cache_size, args.skip_idle,
+                         min_hash, args.checkpoint, args.resume)
+   else:
+      if args.resume:
+         pool = checkpoint.load(args.checkpoint)
+      else:
+         random.seed(seed)
+         pool = population.Population()
+      pool.min_hash = min_hash
+      if args.mating_workers:
+         pool.mating = reproduction.ParallelMating(args.mating_workers)
+      brkout = None
+      if args.workers <= 1 and not args.batch:
+         brkout = breakout.Bricka(headless=args.headless or
+                                  args.spectate != None)
+
+      try:
+         if args.steady_state:
+            steadyState.runSteadyState(pool, brkout, args.workers,
+                                       args.cache_size, args.checkpoint,
+                                       args.skip_idle, seed, args.spectate)
+         else:
+            runBreakout(pool, brkout, args.workers, args.batch,
+                        args.cache_size, args.checkpoint, args.timings,
+                        args.skip_idle, seed, args.spectate)
+      finally:
+         if pool.mating:
+            pool.mating.close()
@@ -0,0 +1,263 @@
+"""
+evaluation.py
+Author: James Richter
+Class: CS 499, Twitchell/Burton
+Last Updated: 10/18/2026
+
+Plays games of Breakout with genomes at the controls, one at a time, on
+worker processes, or all at once in a batch, and saves the genomes
+that win.
+
+The driver, the islands and the steady-state mode all play their games
+with these functions.  They live here instead of in driver.py, which
+imports islands.py and steadyState.py, so that importing them doesn't
+load driver.py a second time.
+"""
+
+import breakout
+import batchBreakout
+import network
+import actionLog
+from timing import timings
+
+import time
+
+import numpy as np
+
+# the game owned by each worker process when evaluating in parallel
+worker_game = None
+worker_skip_idle = False
+
+def getGenomes(pool):
+   """
+   Get every genome in the pool, in the order the driver evaluates them.
+
+   Args:
+      pool: a pool of species that contains all of our genomes
+
+   Returns:
+      genomes_list: a list of genomes
+   """
+   genomes_list = []
+   for _,species in pool.species.items():
+      for i,genome1 in species.genomes.items():
+         genomes_list.append(genome1)
+   return genomes_list
+
+def evaluateGenome(brkout, genome1, skip_idle = False):
+   """
+   Play one game of Breakout from the start with a genome at the controls.
+
+   Every game starts from a freshly initialized board, so the result only
+   depends on the genome.  This is what lets the worker processes and the
+   serial driver agree exactly.
+
+   Args:
+      brkout: an instance of the game breakout
+      genome1: the genome playing the game
+      skip_idle: if True, frames where nothing can happen are played all
+      at once with Bricka.skip_idle(), which gives the same result
+
+   Returns:
+      fitness: the score the game ended with, or None if the window
+      was closed
+      won: True if the genome cleared the board
+   """
+   with timings.timer("network_build"):
+      network1 = genome1.network
+   start_time = time.time()
+   frames = 0
+   activate = network1.activateNetwork
+   step = brkout.step
+   observation = brkout.reset()
+   # the first input is the ball's distance from the paddle, and the
+   # first output moves the paddle
+   follows_ball = 0 in network1.outputsDependingOn(0)
+
+   done = False
+   while not done:
+      # plug in the game outputs into the neural network
+      action = activate(observation)
+      if skip_idle:
+         frames += brkout.skip_idle(action, follows_ball)
+      observation, reward, done, info = step(action)
+      frames += 1
+   timings.addGenome(frames, time.time() - start_time)
+
+   if info["closed"]:
+      return None, False
+   return brkout.score, info["won"]
+
+def evaluateGenomesBatch(genomes_list):
+   """
+   Play one game of Breakout for every genome at the same time, using
+   a batch of games that all move forward a frame together.
+
+   Args:
+      genomes_list: the genomes playing the games
+
+   Returns:
+      results: a (fitness, won) pair for every genome, the same as
+      evaluateGenome() would give
+   """
+   games = batchBreakout.BatchBricka(genomes_list.__len__())
+   with timings.timer("network_build"):
+      networks = network.BatchNetwork()
+      networks.generateNetwork([genome1.network
+                                for genome1 in genomes_list])
+   results = [None] * genomes_list.__len__()
+   playing = range(genomes_list.__len__())
+   # every game's time runs from the start of the batch until it ends
+   start_time = time.time()
+   frames = 0
+
+   observations = games.observe()
+   while playing:
+      observations = games.step(networks.activateNetwork(observations))
+      frames += 1
+      # drop the finished games so that they cost nothing from now on
+      if games.done.any():
+         for i in np.flatnonzero(games.done):
+            results[playing[i]] = (int(games.fitness[i]),
+                                   bool(games.won[i]))
+            timings.addGenome(frames, time.time() - start_time)
+         still_playing = ~games.done
+         playing = [playing[i] for i in np.flatnonzero(still_playing)]
+         games.keep(still_playing)
+         networks.keep(still_playing)
+         observations = observations[still_playing]
+
+   return results
+
+def initWorker(timed = False, skip_idle = False):
+   """
+   Give a worker process its own headless game.
+
+   Args:
+      timed: if True, the worker records timings for the driver
+      skip_idle: if True, the worker skips idle frames
+   """
+   global worker_game, worker_skip_idle
+   worker_game = breakout.Bricka(headless=True)
+   worker_skip_idle = skip_idle
+   timings.enabled = timed
+
+def evaluateInWorker(genome1):
+   """
+   Evaluate a genome on this worker process's game.
+
+   Returns:
+      result: the (fitness, won) pair from evaluateGenome()
+      snapshot: the timings recorded while evaluating it
+   """
+   timings.reset()
+   result = evaluateGenome(worker_game, genome1, worker_skip_idle)
+   return result, timings.snapshot()
+
+def playGenomes(genomes_list, brkout, process_pool = None, batch = False,
+                skip_idle = False):
+   """
+   Play one game of Breakout for every genome.
+
+   Args:
+      genomes_list: the genomes playing the games
+      brkout: an instance of the game breakout, used when there is no
+      process_pool and batch is False
+      process_pool: a pool of worker processes to play the games on
+      batch: if True, play every game at once with batchBreakout
+      skip_idle: if True, headless games skip their idle frames, see
+      evaluateGenome()
+
+   Returns:
+      results: a (fitness, won) pair for every genome, or None if the
+      window was closed
+   """
+   if not genomes_list:
+      return []
+   if batch:
+      return evaluateGenomesBatch(genomes_list)
+   if process_pool:
+      results = []
+      for result, snapshot in process_pool.map(evaluateInWorker,
+                                               genomes_list):
+         results.append(result)
+         timings.merge(snapshot)
+      return results
+   results = []
+   for genome1 in genomes_list:
+      results.append(evaluateGenome(brkout, genome1, skip_idle))
+      # the window was closed
+      if brkout.done:
+         return None
+   return results
+
+def scoreGenomes(genomes_list, keys, cache, brkout, process_pool = None,
+                 batch = False, skip_idle = False):
+   """
+   Get a (fitness, won) result for every genome, from the cache or by
+   playing a game, and put the games played in the cache.  Only one
+   genome plays for each network we haven't seen before.
+
+   Args:
+      genomes_list: the genomes
+      keys: the fitnessCache.fingerprint() of each genome
+      cache: the FitnessCache
+      brkout, process_pool, batch, skip_idle: passed on to playGenomes()
+
+   Returns:
+      results: a (fitness, won) pair for every genome, or None if the
+      window was closed
+   """
+   results = [None] * genomes_list.__len__()
+   unplayed = {}  # {fingerprint: position of the genome that plays it}
+   copies = []
+   for i, key in enumerate(keys):
+      if key in unplayed:
+         # a copy of a genome that is about to play
+         copies.append(i)
+         cache.hits += 1
+         continue
+      results[i] = cache.get(key)
+      if results[i] == None:
+         unplayed[key] = i
+   playing = sorted(unplayed.values())
+
+   # run the breakout game for every genome that needs it
+   with timings.timer("evaluation"):
+      played = playGenomes([genomes_list[i] for i in playing], brkout,
+                           process_pool, batch, skip_idle)
+   if played == None:
+      return None
+   for i, result in zip(playing, played):
+      results[i] = result
+      cache.put(keys[i], result)
+   for i in copies:
+      results[i] = results[unplayed[keys[i]]]
+   return results
+
+def saveWin(genome1, key, fitness, logged, log_game, seed, generation):
+   """
+   Save a genome that won a game with a higher score than every win saved
+   before it, and the log of its game, to the next free winning_genome
+   and winning_game numbers, which are the same.  Once a population
+   learns to clear the board most of its genomes do, so saving every win
+   would write a log for nearly every genome.
+
+   Args:
+      genome1: the genome that won
+      key: its fitnessCache.fingerprint()
+      fitness: the score it won with
+      logged: {fingerprint: score} of every win saved so far, which the
+      win is added to if it is saved
+      log_game: a headless instance of the game breakout
+      seed, generation: saved with the action log
+   """
+   if logged and fitness <= max(logged.values()):
+      return
+   logged[key] = fitness
+   log = actionLog.record(genome1, log_game, seed, generation, key)
+   version = actionLog.freeVersion("winning_genome", "winning_game")
+   genome1.save("winning_genome.%d" % version)
+   log.save("winning_game.%d" % version)
+   print "Winning genome and game saved to winning_genome.%d and " \
+         "winning_game.%d" % (version, version)
@@ -0,0 +1,93 @@
+"""
+fitnessCache.py
+Author: James Richter
+Class: CS 499, Twitchell/Burton
+Last Updated: 10/18/2026
+
+A cache of the fitness of genomes that have already played.
+
+A headless game of Breakout always plays out the same way for the same
+network, and a lot of genomes in a generation are exact copies: the
+best genome of a stale species survives unchanged, a species with one
+genome mates it with itself, and children often inherit the same genes
+when no mutation happens.  Each genome gets a fingerprint of the
+network it builds, and genomes with the same fingerprint share one
+result instead of playing the same game again.
+
+The fingerprint only covers the enabled connections, since disabled
+genes and unconnected nodes don't change what the network outputs.
+The connections are put in order of source and target node, so two
+genomes that numbered the same connections differently still match.
+"""
+
+from lruCache import LRUCache
+
+from array import array
+import hashlib
+
+# the number of results kept before the least recently used is dropped
+DEFAULT_SIZE = 10000
+
+def fingerprint(genome1):
+   """
+   Get the fingerprint of the network a genome builds.
+
+   Args:
+      genome1: the genome
+
+   Returns:
+      fingerprint: a short string that is the same for every genome
+      with the same enabled connections and weights
+   """
+   connections = [(genome1.sources[i], genome1.targets[i], i)
+                  for i in range(genome1.innovations.__len__())
+                  if genome1.enabled[i]]
+   # two connections between the same nodes add up in innovation order
+   connections.sort()
+   nodes = array('i')
+   weights = array('d')
+   for source, target, i in connections:
+      nodes.append(source)
+      nodes.append(target)
+      weights.append(genome1.weights[i])
+   digest = hashlib.sha1(nodes.tostring())
+   digest.update(weights.tostring())
+   return digest.digest()
+
+class FitnessCache(LRUCache):
+   """
+   The results of the most recently played fingerprints.  Keeps count of
+   how many lookups found a result since the counts were last reset.
+   """
+   def __init__(self, size = DEFAULT_SIZE):
+      """
+      Initialize an empty cache.
+
+      Args:
+         size: the most results to keep.  A size of 0 keeps nothing.
+      """
+      LRUCache.__init__(self, size)
+      self.hits = 0
+      self.misses = 0
+
+   def get(self, key):
+      """
+      Look up the result of a fingerprint, counting a hit or a miss.
+
+      Args:
+         key: the fingerprint
+
+      Returns:
+         result: the result stored with put(), or None if there isn't one
+      """
+      result = LRUCache.get(self, key)
+      if result == None:
+         self.misses += 1
+      else:
+         self.hits += 1
+      return result
+
+   def resetCounts(self):
+      """Start counting hits and misses over again."""
+      self.hits = 0
+      self.misses = 0
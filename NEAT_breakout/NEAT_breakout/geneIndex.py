@@ -2,14 +2,187 @@
 geneIndex.py
 Author: James Richter
 Class: CS 499, Twitchell/Burton
-Last Updated: 1/6/2016
+Last Updated: 10/18/2026
 
 An index of genes.  Whenever a new gene is created, it looks at the
 gene_index to see if a gene exists that connects the same two nodes.
 If there is, it uses that index number.  This makes checking the delta
 distance between genomes possible, since they will have genes with
 matching gene_index lookup values.
+
+Innovation numbers count up from 0.  The index keeps the two nodes of
+every innovation, and a lookup from two nodes to the first innovation
+that connected them, so finding or adding an innovation takes the same
+time no matter how many there are.
+
+While species mate in worker processes, the index can't be shared, so
+it records what each one asks for instead.  Every new connection gets
+a provisional number, from PROVISIONAL_INNOVATION up, which is
+swapped for a real one once the requests of every species are merged.
 """
-import gene
 
-gene_index = {}
\ No newline at end of file
+import random
+import time
+
+# provisional innovation numbers start here, far above any real one
+PROVISIONAL_INNOVATION = 1 << 30
+
+class GeneIndex:
+   """Every innovation of the run, numbered in the order they appeared."""
+   def __init__(self):
+      """Initialize an empty index."""
+      self.connections = []  # [(source, target)], by innovation number
+      self.innovations = {}  # {(source, target): first innovation number}
+      self.requests = None   # [(kind, source, target)] while recording
+      self.provisional = {}  # {(kind, source, target): provisional number}
+
+   def __len__(self):
+      return self.connections.__len__()
+
+   def __contains__(self, innovation):
+      return 0 <= innovation < self.connections.__len__()
+
+   def findInnovation(self, source, target):
+      """
+      Find the first innovation that connected two nodes.
+
+      Args:
+         source: the source node
+         target: the target node
+
+      Returns:
+         innovation: the innovation number, or None if there isn't one.
+      """
+      return self.innovations.get((source, target))
+
+   def getInnovation(self, source, target):
+      """
+      Get the innovation number for a connection between two nodes,
+      adding a new one if they have never been connected.
+
+      Args:
+         source: the source node
+         target: the target node
+
+      Returns:
+         innovation: the innovation number
+      """
+      if self.requests != None:
+         return self.request("get", source, target)
+      innovation = self.innovations.get((source, target))
+      if innovation == None:
+         innovation = self.addInnovation(source, target)
+      return innovation
+
+   def addInnovation(self, source, target):
+      """
+      Add a new innovation between two nodes, even if they have been
+      connected before.
+
+      Args:
+         source: the source node
+         target: the target node
+
+      Returns:
+         innovation: the new innovation number
+      """
+      if self.requests != None:
+         return self.request("add", source, target)
+      innovation = self.connections.__len__()
+      self.connections.append((source, target))
+      self.innovations.setdefault((source, target), innovation)
+      return innovation
+
+   def startRecording(self):
+      """
+      Record the innovations asked for from now on, instead of adding
+      them, and give each a provisional number.  The same request
+      always gets the same number.
+      """
+      self.requests = []
+      self.provisional = {}
+
+   def request(self, kind, source, target):
+      """
+      Record a request for an innovation.
+
+      Args:
+         kind: "get" for getInnovation(), "add" for addInnovation()
+         source: the source node
+         target: the target node
+
+      Returns:
+         innovation: the provisional innovation number
+      """
+      key = (kind, source, target)
+      innovation = self.provisional.get(key)
+      if innovation == None:
+         innovation = PROVISIONAL_INNOVATION + self.requests.__len__()
+         self.provisional[key] = innovation
+         self.requests.append(key)
+      return innovation
+
+   def stopRecording(self):
+      """
+      Stop recording requests.
+
+      Returns:
+         requests: (kind, source, target) of every request, in the
+         order of their provisional numbers
+      """
+      requests = self.requests
+      self.requests = None
+      self.provisional = {}
+      return requests
+
+   def merge(self, requests, merged):
+      """
+      Give recorded requests real innovation numbers.  A "get" request
+      gets the innovation that already connects its nodes, if there is
+      one, and an "add" request always gets a new one, except that the
+      same request from two species in the same merge gets the same
+      number.
+
+      Args:
+         requests: the requests from stopRecording()
+         merged: {(kind, source, target): innovation} of the requests
+         merged so far, which new ones are added to
+
+      Returns:
+         innovations: the real number of each request
+      """
+      innovations = []
+      for key in requests:
+         innovation = merged.get(key)
+         if innovation == None:
+            kind, source, target = key
+            if kind == "get":
+               innovation = self.getInnovation(source, target)
+            else:
+               innovation = self.addInnovation(source, target)
+            merged[key] = innovation
+         innovations.append(innovation)
+      return innovations
+
+gene_index = GeneIndex()
+
+if __name__ == "__main__":
+   # show that mutating a genome costs the same however big the
+   # index gets
+   import geneIndex
+   from genome import Genome
+   random.seed(0)
+   for size in [1000, 10000, 100000]:
+      index = geneIndex.gene_index
+      index.__init__()
+      for i in range(size):
+         index.addInnovation(random.randint(-3, 100000), i + 100001)
+      start_time = time.time()
+      for i in range(2000):
+         genome1 = Genome(3, 2, 0, 0)
+         for j in range(5):
+            genome1.mutateAddConnection()
+            genome1.mutateAddNeuron()
+      elapsed = time.time() - start_time
+      print "%6d innovations: %.2f us per mutation" % \
+            (size, elapsed / 20000 * 1e6)
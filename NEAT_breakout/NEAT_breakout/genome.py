@@ -18,21 +18,41 @@ from network import Network
 from network import MAX_LAYER
 from gene import Gene
 from geneIndex import gene_index
+import fitnessCache
+import lruCache
 
-import copy
+from array import array
+from bisect import bisect_left
+from itertools import izip
 import pickle
 import random
+import sys
 
 ADD_CONNECTION_CHANCE = 0.45
 ADD_NEURON_CHANCE = 0.05
 ONE_WEIGHT_CHANCE = 0.5
 ALL_WEIGHT_CHANCE = 0.1
 
+# the number of compiled networks kept for genomes to share
+NETWORK_CACHE_SIZE = 1000
+
 class Genome:
    """
    The genetic information for one individual of a species.  This
    genetic information can be saved and reloaded later, it can be
    activated to see how it performs, or it can be mutated.
+
+   The genes are kept as five typed arrays in order of innovation
+   number: the innovation numbers, source neurons, target neurons,
+   weights and enabled flags.  The genes property still gives the old
+   dictionary of Gene objects, as a copy.
+
+   A genome doesn't hold on to its compiled network.  The network
+   property looks it up in network_cache, by the genome's fingerprint,
+   and compiles it if it isn't there, so genomes that build the same
+   network share one, and the networks kept are capped at
+   NETWORK_CACHE_SIZE.  The fingerprint is only worked out again after
+   the genes change: everything that changes them calls markDirty().
    """
    def __init__(self, num_inputs, num_outputs, species, name):
       """
@@ -47,11 +67,15 @@ class Genome:
          species: the name of the species to which this genome belongs.
          name: the name of this genome.
       """
-      self.genes = {}  # {innovation_number, Gene}
+      self.innovations = array('i')
+      self.sources = array('i')
+      self.targets = array('i')
+      self.weights = array('d')
+      self.enabled = array('b')
       self.nodes = set()
       self.num_inputs = num_inputs
       self.num_outputs = num_outputs
-      self.network = None
+      self.network_key = None  # our fingerprint, None when dirty
       self.fitness = 0
       self.species = species
       self.name = name
@@ -67,42 +91,185 @@ class Genome:
       # add the bias to the node set
       self.nodes.add(0)
 
+   def __setstate__(self, state):
+      """Load a pickled genome, including ones pickled with Gene objects."""
+      genes = state.pop('genes', None)
+      # genomes used to be pickled with their networks
+      state.pop('network', None)
+      state.setdefault('network_key', None)
+      self.__dict__.update(state)
+      if genes != None:
+         self.setGenes(genes)
+
    def copy(self, genome1):
       """Copy constructor for the Genome class"""
-      self.genes = copy.deepcopy(genome1.genes)
+      self.innovations = array('i', genome1.innovations)
+      self.sources = array('i', genome1.sources)
+      self.targets = array('i', genome1.targets)
+      self.weights = array('d', genome1.weights)
+      self.enabled = array('b', genome1.enabled)
       self.num_inputs = genome1.num_inputs
       self.num_outputs = genome1.num_outputs
       self.nodes = genome1.nodes.copy()
       self.fitness = genome1.fitness
       self.species = genome1.species
       self.name = genome1.name
-      self.generateNetwork()
+      self.network_key = genome1.network_key
 
    def __repr__(self):
       genomeString = ''
-      for _,gene in self.genes.items():
+      for _,gene in sorted(self.genes.items()):
          genomeString += str(gene)
          genomeString += '\n'
       genomeString += '\nNodes: ' + str(sorted(self.nodes))
       return genomeString
+
+   def getGenes(self):
+      """
+      Get the genes as a dictionary of {innovation number: Gene}.  The
+      Gene objects are copies, so changing them does not change us.
+      """
+      genes = {}
+      for i, innov in enumerate(self.innovations):
+         g = Gene()
+         g.source_neuron = self.sources[i]
+         g.target_neuron = self.targets[i]
+         g.weight = self.weights[i]
+         g.enabled = bool(self.enabled[i])
+         genes[innov] = g
+      return genes
+
+   genes = property(getGenes)
+
+   def setGenes(self, genes):
+      """
+      Replace our genes with a dictionary of {innovation number: Gene}.
+      """
+      self.innovations = array('i')
+      self.sources = array('i')
+      self.targets = array('i')
+      self.weights = array('d')
+      self.enabled = array('b')
+      self.markDirty()
+      for innov, gene in sorted(genes.items()):
+         self.appendGene(innov, gene.source_neuron, gene.target_neuron,
+                         gene.weight, gene.enabled)
+
+   def appendGene(self, innov, source, target, weight, enabled = True):
+      """
+      Add a gene to the end of our genes.  Its innovation number must
+      be higher than any we have.
+      """
+      self.markDirty()
+      self.innovations.append(innov)
+      self.sources.append(source)
+      self.targets.append(target)
+      self.weights.append(weight)
+      self.enabled.append(enabled)
+
+   def inheritGene(self, parent, i):
+      """
+      Add a copy of a parent's gene to the end of our genes.  Its
+      innovation number must be higher than any we have.
+
+      Args:
+         parent: the parent genome
+         i: the position of the gene in the parent's genes
+      """
+      self.appendGene(parent.innovations[i], parent.sources[i],
+                      parent.targets[i], parent.weights[i],
+                      parent.enabled[i])
+
+   def renumberGenes(self, innovations):
+      """
+      Give our genes new innovation numbers, and put them back in order
+      of innovation number.
+
+      Args:
+         innovations: the new innovation number of each gene, in the
+         order the genes are in now
+      """
+      self.markDirty()
+      genes = sorted(izip(innovations, self.sources, self.targets,
+                          self.weights, self.enabled))
+      self.innovations = array('i', [gene[0] for gene in genes])
+      self.sources = array('i', [gene[1] for gene in genes])
+      self.targets = array('i', [gene[2] for gene in genes])
+      self.weights = array('d', [gene[3] for gene in genes])
+      self.enabled = array('b', [gene[4] for gene in genes])
+
+   def setGene(self, innov, source, target, weight, enabled = True):
+      """
+      Set the gene with an innovation number, adding it in order if we
+      don't have it yet.
+
+      Args:
+         innov: the innovation number
+         source: the source neuron
+         target: the target neuron
+         weight: the weight of the connection
+         enabled: whether the connection is enabled
+      """
+      self.markDirty()
+      i = bisect_left(self.innovations, innov)
+      if i < self.innovations.__len__() and self.innovations[i] == innov:
+         self.sources[i] = source
+         self.targets[i] = target
+         self.weights[i] = weight
+         self.enabled[i] = enabled
+      else:
+         self.innovations.insert(i, innov)
+         self.sources.insert(i, source)
+         self.targets.insert(i, target)
+         self.weights.insert(i, weight)
+         self.enabled.insert(i, enabled)
       
+   def markDirty(self):
+      """Note that our genes have changed, so our network has too."""
+      self.network_key = None
+
+   def getNetworkKey(self):
+      """
+      Get the fitnessCache.fingerprint() of our network, working it out
+      again only if our genes have changed since the last time.
+      """
+      if self.network_key == None:
+         self.network_key = fitnessCache.fingerprint(self)
+      return self.network_key
+
    def generateNetwork(self):
       """
-      Generate the neural network from the genes.
-      This is necessary for activateNetwork().
+      Generate the neural network from the genes, even if network_cache
+      already has it, and put it in network_cache.
+
+      Returns:
+         network: the compiled Network
+      """
+      network = Network()
+      network.num_inputs = self.num_inputs
+      network.num_outputs = self.num_outputs
+      network.generateNetwork(izip(self.sources, self.targets,
+                                   self.weights, self.enabled),
+                              self.nodes)
+      network_cache.put(self.getNetworkKey(), network)
+      return network
+
+   def getNetwork(self):
+      """
+      Get our compiled network from network_cache, compiling it if it
+      isn't there.
       """
-      self.network = Network()
-      self.network.num_inputs = self.num_inputs
-      self.network.num_outputs = self.num_outputs
-      self.network.generateNetwork(self.genes, self.nodes)
+      network = network_cache.get(self.getNetworkKey())
+      if network == None:
+         network = self.generateNetwork()
+      return network
+
+   network = property(getNetwork)
    
    def generateNodes(self):
-      """ Create a list of nodes from self.genes"""
-      for _,gene in self.genes.items():
-         if gene.source_neuron not in self.nodes:
-            self.nodes.add(gene.source_neuron)
-         if gene.target_neuron not in self.nodes:
-            self.nodes.add(gene.target_neuron)
+      """ Create a list of nodes from our genes"""
+      self.nodes.update(self.sources)
+      self.nodes.update(self.targets)
    
    def activateNetwork(self, inputs):
       """
@@ -114,8 +281,6 @@ class Genome:
       Returns:
          outputs: the outputs from the neural network in a list.
       """
-      if self.network == None:
-         self.generateNetwork()
       outputs = self.network.activateNetwork(inputs)
       return outputs
 
@@ -152,9 +317,10 @@ class Genome:
          node1, node2 = sorted(random.sample(self.nodes, 2))
       
       # make sure we didn't get 2 nodes that are already connected
-      for inno, gene in self.genes.items():
-         if gene.source_neuron == node1 and gene.target_neuron == node2:
-            gene.enabled = True
+      for i in range(self.innovations.__len__()):
+         if self.sources[i] == node1 and self.targets[i] == node2:
+            self.enabled[i] = True
+            self.markDirty()
             return
       
       self.addGene(node1, node2)
@@ -167,25 +333,12 @@ class Genome:
          node1: the first node
          node2: the second node
       """
-      # connect the two valid, unconnected nodes
-      g = Gene()
-      g.source_neuron = node1
-      g.target_neuron = node2
-      g.weight = random.random() * 4 - 2
-      #check to see if the gene already exists in the index
-      for index,gene in gene_index.items():
-         if gene.source_neuron == node1 and gene.target_neuron == node2:
-            # if found, use that same innovation number
-            self.genes[index] = g
-            return
-      
-      #if it's not in the index, add it and record in the index
-      if gene_index:
-         self.genes[max(gene_index) + 1] = g
-         gene_index[max(gene_index) + 1] = g
-      else:
-         gene_index[0] = g
-         self.genes[0] = g
+      # connect the two valid, unconnected nodes, using the same
+      # innovation number as any gene that already connects these
+      # nodes, or recording a new one in the index
+      weight = random.random() * 4 - 2
+      self.setGene(gene_index.getInnovation(node1, node2), node1, node2,
+                   weight)
          
    def mutateAddNeuron(self):
       """
@@ -195,21 +348,17 @@ class Genome:
       the new node and the original gene nodes.
       """
       # get one random gene
-      if self.genes:
-         innov = random.sample(self.genes, 1)[0]
+      if self.innovations:
+         i = random.randrange(self.innovations.__len__())
       else:
          return
-      gene = self.genes[innov]
       
-      node1 = gene.source_neuron
-      node2 = gene.target_neuron
+      node1 = self.sources[i]
+      node2 = self.targets[i]
       # make sure our nodes aren't two consecutive integers
       if node1 + 1 > node2 - 1:
          return
       
-      g = Gene()
-      g.copy(gene)
-
       # create a new node
       node = random.randint(node1 + 1, node2 - 1)
       
@@ -220,44 +369,69 @@ class Genome:
       assert node >= 1 and node <= MAX_LAYER
       
       # morph the gene into two genes and add the node
-      g1 = Gene()
-      g1.source_neuron = node1
-      g1.target_neuron = node
-      g1.weight = 1
-      g2 = Gene()
-      g2.source_neuron = node
-      g2.target_neuron = node2
-      g2.weight = gene.weight
+      weight = self.weights[i]
       self.nodes.add(node)
       
       # disable the original gene, replace it with the new ones
-      g.enabled = False
-      self.genes[innov] = g
-      self.genes[max(gene_index) + 1] = g1
-      self.genes[max(gene_index) + 2] = g2
+      self.enabled[i] = False
+      self.markDirty()
       
       #add the new genes to the index
-      gene_index[max(gene_index) + 1] = g1
-      gene_index[max(gene_index) + 1] = g2
+      self.setGene(gene_index.addInnovation(node1, node), node1, node, 1)
+      self.setGene(gene_index.addInnovation(node, node2), node, node2,
+                   weight)
       
 
    def mutateOneWeight(self):
       """Find a random gene, and alter its weight a little."""
-      if self.genes:
-         innov = random.sample(self.genes, 1)[0]
+      if self.innovations:
+         i = random.randrange(self.innovations.__len__())
       else:
          return
       v = random.random()
-      g = Gene()
-      g.copy(self.genes[innov])
-      g.weight += v * .2 - .1
-      self.genes[innov] = g
+      self.weights[i] += v * .2 - .1
+      self.markDirty()
 
          
    def mutateAllWeights(self):
       """Find all genes, and alter their weights a little."""
-      g = Gene()
-      for innov in self.genes:
-         g.copy(self.genes[innov])
-         g.weight += random.random() * .2 - 1
-         self.genes[innov] = g
+      for i in range(self.weights.__len__()):
+         self.weights[i] += random.random() * .2 - 1
+      self.markDirty()
+
+# compiled networks, by fingerprint, shared by every genome
+network_cache = lruCache.LRUCache(NETWORK_CACHE_SIZE)
+
+def geneBytes(genome):
+   """Roughly how many bytes a genome's genes take up."""
+   arrays = [genome.innovations, genome.sources, genome.targets,
+             genome.weights, genome.enabled]
+   return sum(sys.getsizeof(a) for a in arrays)
+
+def geneDictionaryBytes(genes):
+   """Roughly how many bytes a dictionary of Gene objects takes up."""
+   size = sys.getsizeof(genes)
+   for innov, gene in genes.items():
+      size += sys.getsizeof(innov) + sys.getsizeof(gene) + \
+              sys.getsizeof(gene.__dict__) + sys.getsizeof(gene.weight)
+   return size
+
+if __name__ == "__main__":
+   # compare the memory our genes take up with the old dictionaries
+   # of Gene objects, for a typical genome of about 20 genes
+   random.seed(0)
+   for size in [200, 5000]:
+      genomes = []
+      for i in range(size):
+         genome1 = Genome(3, 2, 0, i)
+         for j in range(12):
+            genome1.mutateAddConnection()
+            genome1.mutateAddNeuron()
+         genomes.append(genome1)
+      genes = sum(g.innovations.__len__() for g in genomes)
+      arrays = sum(geneBytes(g) for g in genomes)
+      dictionaries = sum(geneDictionaryBytes(g.genes) for g in genomes)
+      print "%4d genomes, %6d genes: arrays %7.1f KB, Gene dictionaries " \
+            "%7.1f KB (%.1fx)" % (size, genes, arrays / 1024.,
+                                  dictionaries / 1024.,
+                                  float(dictionaries) / arrays)
@@ -0,0 +1,265 @@
+"""
+islands.py
+Author: James Richter
+Class: CS 499, Twitchell/Burton
+Last Updated: 10/18/2026
+
+Evolves several populations at once, each on an island of its own.
+
+Every island is a process with its own population, species, game and
+fitness cache, so each one evolves as fast as a core can play its
+games, and adding cores adds islands instead of slowing any of them
+down.  The islands are joined in a ring.  Every few generations an
+island sends copies of its best genomes to the next island, which puts
+them in place of its worst genomes.  Islands never wait for each
+other: migrants are picked up whenever they have arrived.
+
+Each island numbers its own innovations, so the same connection can
+have a different number on two islands.  A migrant's genes are given
+the numbers the island it lands on uses for the same two nodes (genes
+keep their nodes), so deltaGenome() compares it with the locals the
+same way it compares locals with each other.  Each island remembers
+how it renumbered every other island's innovations, in its population's
+translation, so the same gene always gets the same number.  The
+translation is saved with the island's checkpoint, so this still holds
+after --resume.
+
+The driver process only collects what the islands report: the fitness
+of every generation, the number of games played, and the genomes that
+won with a better score than the island won with before, which it
+saves the same way the driver does.  It prints how many
+games have been played an hour, and how long it took to reach each new
+best fitness.
+"""
+
+import breakout
+import checkpoint
+import evaluation
+import fitnessCache
+import population
+from geneIndex import gene_index
+
+import multiprocessing
+import pickle
+import Queue
+import random
+import time
+
+# the number of generations between an island sending migrants
+MIGRATION_INTERVAL = 5
+# the number of genomes an island sends
+MIGRANTS = 2
+
+def adoptGenome(genome1, island, translation):
+   """
+   Give a migrant's genes this island's innovation numbers.
+
+   Args:
+      genome1: the migrant, which is changed in place
+      island: the island the migrant came from
+      translation: {(island, innovation): innovation} of every
+      innovation from another island that has been renumbered, which
+      new ones are added to
+   """
+   innovations = []
+   used = set()
+   for i in range(genome1.innovations.__len__()):
+      source = genome1.sources[i]
+      target = genome1.targets[i]
+      key = (island, genome1.innovations[i])
+      innovation = translation.get(key)
+      if innovation == None:
+         innovation = gene_index.findInnovation(source, target)
+         if innovation == None or innovation in used:
+            innovation = gene_index.addInnovation(source, target)
+         translation[key] = innovation
+      elif innovation in used:
+         # two of the migrant's genes connect the same two nodes
+         innovation = gene_index.addInnovation(source, target)
+      used.add(innovation)
+      innovations.append(innovation)
+   genome1.renumberGenes(innovations)
+
+def sendMigrants(genomes_list, number, outbox, migrants):
+   """
+   Send copies of an island's best genomes to the next island.
+
+   Args:
+      genomes_list: the island's genomes, with their fitness
+      number: the number of the island
+      outbox: the next island's queue
+      migrants: the number of genomes to send
+   """
+   best = sorted(genomes_list, key=lambda genome1: genome1.fitness,
+                 reverse=True)[:migrants]
+   # pickled now, since the genomes change before the queue's thread
+   # gets around to sending them
+   outbox.put(pickle.dumps((number, best), pickle.HIGHEST_PROTOCOL))
+
+def receiveMigrants(pool, inbox):
+   """
+   Put every migrant that has arrived in place of the worst genomes of
+   the population.  Migrants keep the fitness they had on their own
+   island, since a network always plays the same game.
+
+   Args:
+      pool: the island's population
+      inbox: the island's queue
+
+   Returns:
+      arrived: the number of migrants that arrived
+   """
+   worst = sorted((genome1.fitness, name, key)
+                  for name, specie in pool.species.items()
+                  for key, genome1 in specie.genomes.items())
+   arrived = 0
+   while True:
+      try:
+         island, genomes_list = pickle.loads(inbox.get_nowait())
+      except Queue.Empty:
+         return arrived
+      for genome1 in genomes_list:
+         if not worst:
+            return arrived
+         fitness, name, key = worst.pop(0)
+         adoptGenome(genome1, island, pool.translation)
+         genome1.species = name
+         pool.species[name].genomes[key] = genome1
+         arrived += 1
+
+def runIsland(number, seed, inbox, outbox, reports,
+              migration_interval = MIGRATION_INTERVAL, migrants = MIGRANTS,
+              cache_size = fitnessCache.DEFAULT_SIZE, skip_idle = False,
+              min_hash = None, checkpoint_file = None, resume = False):
+   """
+   Evolve one island's population forever.  This is the target of the
+   island's process.
+
+   Args:
+      number: the number of the island
+      seed: the random seed the island starts from
+      inbox: the queue migrants arrive on
+      outbox: the queue of the next island
+      reports: the queue every generation is reported to the driver on
+      migration_interval: the number of generations between sending
+      migrants
+      migrants: the number of genomes sent each time
+      cache_size: the number of fitness results to remember
+      skip_idle: if True, games skip their idle frames
+      min_hash: passed on to Population.min_hash
+      checkpoint_file: if given, the island's population is saved to
+      this file at the start of every generation
+      resume: if True, carry on from checkpoint_file instead
+   """
+   if resume:
+      pool = checkpoint.load(checkpoint_file)
+   else:
+      random.seed(seed)
+      pool = population.Population()
+   pool.min_hash = min_hash
+   brkout = breakout.Bricka(headless=True)
+   cache = fitnessCache.FitnessCache(cache_size)
+   # the best score the island has won with, since only wins that beat
+   # it can be saved
+   best_win = None
+
+   while True:
+      if checkpoint_file:
+         checkpoint.save(checkpoint_file, pool)
+      genomes_list = evaluation.getGenomes(pool)
+      cache.resetCounts()
+      keys = [genome1.getNetworkKey() for genome1 in genomes_list]
+      results = evaluation.scoreGenomes(genomes_list, keys, cache, brkout,
+                                        skip_idle=skip_idle)
+      wins = []
+      for genome1, key, (fitness, won) in zip(genomes_list, keys, results):
+         genome1.fitness = fitness
+         if won and fitness > best_win:
+            best_win = fitness
+            wins.append((key, fitness,
+                         pickle.dumps(genome1, pickle.HIGHEST_PROTOCOL)))
+
+      if pool.generation % migration_interval == migration_interval - 1:
+         sendMigrants(genomes_list, number, outbox, migrants)
+      arrived = receiveMigrants(pool, inbox)
+      best = max(genome1.fitness for genome1 in genomes_list)
+
+      pool.nextGeneration()
+      reports.put((number, pool.generation - 1, cache.misses, arrived,
+                   best, pool.total_average_fitness, wins))
+
+def runIslands(number_islands, seed = None,
+               migration_interval = MIGRATION_INTERVAL, migrants = MIGRANTS,
+               cache_size = fitnessCache.DEFAULT_SIZE, skip_idle = False,
+               min_hash = None, checkpoint_file = None, resume = False):
+   """
+   Evolve number_islands populations, each in a process of its own,
+   until interrupted.
+
+   Args:
+      number_islands: the number of islands
+      seed: the random seed the run started from.  Each island starts
+      from a seed of its own, drawn from this one.
+      migration_interval, migrants, cache_size, skip_idle, min_hash:
+      passed on to runIsland()
+      checkpoint_file: if given, each island saves its population to
+      this file with its number on the end
+      resume: if True, each island carries on from its checkpoint file
+   """
+   seeds = random.Random(seed)
+   inboxes = []
+   for i in range(number_islands):
+      inboxes.append(multiprocessing.Queue())
+      # don't wait for migrants that were never picked up when exiting
+      inboxes[i].cancel_join_thread()
+   reports = multiprocessing.Queue()
+   processes = []
+   for i in range(number_islands):
+      island_checkpoint = None
+      if checkpoint_file:
+         island_checkpoint = "%s.%d" % (checkpoint_file, i)
+      processes.append(multiprocessing.Process(
+         target=runIsland,
+         args=(i, seeds.randrange(2 ** 31), inboxes[i],
+               inboxes[(i + 1) % number_islands], reports,
+               migration_interval, migrants, cache_size, skip_idle,
+               min_hash, island_checkpoint, resume)))
+      processes[i].daemon = True
+      processes[i].start()
+
+   start_time = time.time()
+   games_played = 0
+   best_fitness = None
+   first_win = None
+   # the wins that have been saved
+   logged = {}
+   log_game = breakout.Bricka(headless=True)
+   try:
+      while True:
+         try:
+            # a timeout, so that an island that dies is noticed
+            report = reports.get(timeout=10)
+         except Queue.Empty:
+            if not all(process.is_alive() for process in processes):
+               print "An island stopped running."
+               return
+            continue
+         number, generation, played, arrived, best, average, wins = report
+         games_played += played
+         elapsed = time.time() - start_time
+         print "Island", number, "generation", generation, ": best", best, \
+               "average", average, ",", arrived, "migrants,", \
+               games_played, "games in %.0f s (%.0f per hour)" % \
+               (elapsed, games_played / max(elapsed, 1e-9) * 3600)
+         if best > best_fitness:
+            best_fitness = best
+            print "Best fitness so far:", best, "after %.1f s" % elapsed
+         for key, fitness, pickled in wins:
+            if first_win == None:
+               first_win = elapsed
+               print "First win after %.1f s" % first_win
+            evaluation.saveWin(pickle.loads(pickled), key, fitness, logged,
+                               log_game, seed, generation)
+   finally:
+      for process in processes:
+         process.terminate()
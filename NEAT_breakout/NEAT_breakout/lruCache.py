@@ -0,0 +1,63 @@
+"""
+lruCache.py
+Author: James Richter
+Class: CS 499, Twitchell/Burton
+Last Updated: 10/18/2026
+
+A cache that holds a limited number of values, and drops the least
+recently used one to make room for a new one.
+
+The fitness cache keeps the results of games that have been played in
+one, and genomes keep their compiled networks in another.
+"""
+
+from collections import OrderedDict
+
+class LRUCache:
+   """
+   The values of the most recently used keys, at most size of them.
+   """
+   def __init__(self, size):
+      """
+      Initialize an empty cache.
+
+      Args:
+         size: the most values to keep.  A size of 0 keeps nothing.
+      """
+      self.size = size
+      self.values = OrderedDict()
+
+   def __len__(self):
+      return self.values.__len__()
+
+   def get(self, key):
+      """
+      Look up the value of a key.
+
+      Args:
+         key: the key
+
+      Returns:
+         value: the value stored with put(), or None if there isn't one
+      """
+      value = self.values.pop(key, None)
+      if value != None:
+         # move it to the most recently used end
+         self.values[key] = value
+      return value
+
+   def put(self, key, value):
+      """
+      Store the value of a key, dropping the least recently used value
+      if the cache is full.
+
+      Args:
+         key: the key
+         value: the value to store
+      """
+      if self.size <= 0:
+         return
+      self.values.pop(key, None)
+      self.values[key] = value
+      while self.values.__len__() > self.size:
+         self.values.popitem(last=False)
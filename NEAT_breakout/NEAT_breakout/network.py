@@ -20,10 +20,17 @@ much easier.
 """
 import math
 
+import numpy as np
+
 MAX_LAYER = 100000
 INPUT_LAYER = 0
 OUTPUT_LAYER = MAX_LAYER + 1
 
+# An output neuron with no incoming connections has a value of None.
+# None compares less than any number, so wherever outputs have to be
+# numbers, negative infinity stands in for it.
+NO_OUTPUT = float("-inf")
+
 def sigmoid(x):
    """A sigmoid function with a gradual slope."""
    if x > 100:
@@ -32,7 +39,15 @@ def sigmoid(x):
       return 0
    return 2.0 / (1.0 + math.exp(-4.9*x))
 
-# helper class for our network
+def sigmoidArray(x):
+   """The same sigmoid function, on every element of an array."""
+   with np.errstate(over='ignore'):
+      curve = 2.0 / (1.0 + np.exp(-4.9*x))
+   return np.where(x > 100, 1.0, np.where(x < -100, 0.0, curve))
+
+# helper class for our network.  Networks are now compiled into flat
+# lists instead, but genomes pickled with their old networks still
+# need this class to load.
 class Neuron:
    """A single neuron in our neural network."""
    def __init__(self):
@@ -47,37 +62,85 @@ class Neuron:
 class Network:
    """
    A neural network, used for calculating outputs to the system.
-   Contains neurons, and functions for generating and activating
-   a network from genetic information.
+   Contains functions for compiling a network from genetic information
+   and activating it.
+
+   The network is compiled once into a plan.  Every node gets a slot
+   in sorted order, so inputs come first and outputs come last, and the
+   enabled connections are laid out in flat lists grouped by their
+   source node.  Since a connection always goes from a lower node to a
+   higher one, one pass over the plan activates the whole network.
+   The connections are also kept as parallel source, target and weight
+   lists, for code that packs many networks together.
    """
    def __init__(self):
-      self.neurons = {} # {node: neuron}
+      self.node_order = []      # the node in each slot
+      self.initial_values = []  # the value of each slot before activation
+      self.num_input_slots = 0
+      self.edge_sources = []    # the source slot of each connection
+      self.edge_targets = []    # the target slot of each connection
+      self.edge_weights = []    # the weight of each connection
+      self.output_slots = []
+      self.plan = []            # [(source slot, [(target slot, weight)])]
    
    def generateNetwork(self, genes, nodes):
       """
-      Generate the neural network from its genes and nodes.
+      Compile the neural network from its genes and nodes.
       
       Args:
-         genes: a dictionary of genes.
+         genes: (source, target, weight, enabled) for every gene, in
+         order of innovation number.
          nodes: a list of nodes.
       """
-      orderedNodes = sorted(nodes)
-      
-      # add all the nodes
-      for node in orderedNodes:
-         self.neurons[node] = Neuron()
-         # bias
-         if node == 0:
-            self.neurons[node].value = 1
+      self.node_order = sorted(nodes)
+      slots = {}
+      outgoing = {}
+      for slot, node in enumerate(self.node_order):
+         slots[node] = slot
+         outgoing[node] = []
             
       # find the outgoing connections and weights
-      for _,gene in genes.items():
-         if gene.enabled:
-            source = gene.source_neuron
-            target = gene.target_neuron
-            weight = gene.weight
-            self.neurons[source].outgoing.append(target)
-            self.neurons[source].outgoing_weight.append(weight)
+      connected = set()
+      for source, target, weight, enabled in genes:
+         if enabled:
+            outgoing[source].append((slots[target], weight))
+            connected.add(target)
+
+      # A node without incoming connections has no value, and sends
+      # nothing to its targets (but they still get a value of 0).
+      # Inputs and the bias always have a value.
+      self.initial_values = []
+      self.num_input_slots = 0
+      self.output_slots = []
+      has_value = []
+      for slot, node in enumerate(self.node_order):
+         if node < 0:
+            self.num_input_slots += 1
+            self.initial_values.append(None)
+            has_value.append(True)
+         elif node == 0:
+            self.initial_values.append(1)
+            has_value.append(True)
+         elif node in connected:
+            self.initial_values.append(0.0)
+            has_value.append(True)
+         else:
+            self.initial_values.append(None)
+            has_value.append(False)
+         if node > MAX_LAYER:
+            self.output_slots.append(slot)
+
+      self.edge_sources = []
+      self.edge_targets = []
+      self.edge_weights = []
+      self.plan = []
+      for slot, node in enumerate(self.node_order):
+         if has_value[slot] and outgoing[node]:
+            self.plan.append((slot, outgoing[node]))
+            for target, weight in outgoing[node]:
+               self.edge_sources.append(slot)
+               self.edge_targets.append(target)
+               self.edge_weights.append(weight)
       
    def activateNetwork(self, inputs):
       """
@@ -87,35 +150,173 @@ class Network:
          inputs: a tuple or list of inputs
         
       Returns:
-         outputs: a list of outputs
+         outputs: a list of outputs, in order of their node.  An output
+         with no incoming connections is None.
       """
-      outputs = {}
-      neurons = self.neurons
-      inputCounter = 0
-      
-      # flush the network
-      for _,neuron in neurons.items():
-         neuron.value = None
+      values = self.initial_values[:]
+      num_inputs = self.num_input_slots
+      values[:num_inputs] = inputs[:num_inputs]
       
-      for node in sorted(neurons):
-         neuron = neurons[node]
-         # plug in if it's input
-         if node < 0:
-            neuron.value = inputs[inputCounter]
-            inputCounter += 1
-            
-         if node == 0:
-            neuron.value = 1
-         
-         outgoing = neuron.outgoing
+      for source, edges in self.plan:
+         activation = sigmoid(values[source])
          # add effect to outgoing nodes
-         for i in range(outgoing.__len__()):
-            if neurons[outgoing[i]].value == None:
-               neurons[outgoing[i]].value = 0
-            neurons[outgoing[i]].value += neuron.outgoing_weight[i] \
-               * sigmoid(neuron.value)
+         for target, weight in edges:
+            values[target] += weight * activation
             
-         if node > MAX_LAYER:
-            outputs[node] = neuron.value
-            
-      return outputs
\ No newline at end of file
+      return [values[slot] for slot in self.output_slots]
+
+   def outputsDependingOn(self, input_number):
+      """
+      Find the outputs that an input can change, by following the
+      connections out of it.
+
+      Args:
+         input_number: the position of the input in the inputs
+
+      Returns:
+         outputs: a set of positions in the outputs
+      """
+      reached = set([input_number])
+      # the plan goes in order of slot, and connections always go to a
+      # higher slot, so one pass finds everything downstream
+      for source, edges in self.plan:
+         if source in reached:
+            for target, weight in edges:
+               reached.add(target)
+      return set(i for i, slot in enumerate(self.output_slots)
+                 if slot in reached)
+
+class BatchNetwork:
+   """
+   Many compiled networks, packed together so that they can all be
+   activated at once.  Each network's slots and plan are padded out to
+   the size of the largest one, with padding connections pointing at a
+   spare slot on the end with a weight of 0.
+
+   Networks are activated one source node at a time, in the same order
+   as Network.activateNetwork(), so every output is added up in the
+   same order and comes out the same.
+   """
+   def __init__(self):
+      self.num_networks = 0
+      self.num_input_slots = 0
+      self.initial_values = None  # [network, slot]
+      self.sources = None         # [step, network]: the source slot
+      self.targets = None         # [step, network, connection]
+      self.weights = None         # [step, network, connection]
+      self.repeats = None         # [step, network]: a target repeats
+      self.output_slots = None    # [network, output]
+      self.connected_outputs = None
+      # sources and targets again, as indexes into the values of every
+      # network laid end to end, so each step is one gather and scatter
+      self.flat_sources = None
+      self.flat_targets = None
+
+   def generateNetwork(self, networks):
+      """
+      Pack compiled networks together.  They must all have the same
+      number of inputs and outputs.
+
+      Args:
+         networks: a list of compiled Networks.
+      """
+      self.num_networks = networks.__len__()
+      self.num_input_slots = networks[0].num_input_slots
+      num_slots = max(n.node_order.__len__() for n in networks)
+      num_steps = max(n.plan.__len__() for n in networks)
+      num_connections = max([edges.__len__() for n in networks
+                             for _,edges in n.plan] + [1])
+      num_outputs = networks[0].output_slots.__len__()
+      spare = num_slots
+
+      self.initial_values = np.zeros((self.num_networks, num_slots + 1))
+      self.sources = np.empty((num_steps, self.num_networks), dtype=int)
+      self.sources.fill(spare)
+      self.targets = np.empty((num_steps, self.num_networks,
+                               num_connections), dtype=int)
+      self.targets.fill(spare)
+      self.weights = np.zeros((num_steps, self.num_networks,
+                               num_connections))
+      self.repeats = np.zeros((num_steps, self.num_networks), dtype=bool)
+      self.output_slots = np.empty((self.num_networks, num_outputs),
+                                   dtype=int)
+      self.connected_outputs = np.zeros((self.num_networks, num_outputs),
+                                        dtype=bool)
+
+      for i, network in enumerate(networks):
+         for slot, value in enumerate(network.initial_values):
+            if value != None:
+               self.initial_values[i, slot] = value
+         for step, (source, edges) in enumerate(network.plan):
+            self.sources[step, i] = source
+            for j, (target, weight) in enumerate(edges):
+               self.targets[step, i, j] = target
+               self.weights[step, i, j] = weight
+            self.repeats[step, i] = \
+               set(t for t,_ in edges).__len__() < edges.__len__()
+         self.output_slots[i] = network.output_slots
+         for j, slot in enumerate(network.output_slots):
+            self.connected_outputs[i, j] = \
+               network.initial_values[slot] != None
+
+      self.layOut()
+
+   def keep(self, networks):
+      """
+      Drop every network that is not in the mask networks, so that
+      finished games no longer cost anything to activate.
+
+      Args:
+         networks: a boolean mask of the networks to keep.
+      """
+      self.num_networks = int(networks.sum())
+      self.initial_values = self.initial_values[networks]
+      self.output_slots = self.output_slots[networks]
+      self.connected_outputs = self.connected_outputs[networks]
+      # steps that are only padding now can be skipped
+      spare = self.initial_values.shape[1] - 1
+      sources = self.sources[:, networks]
+      steps = (sources != spare).any(axis=1)
+      self.sources = sources[steps]
+      self.targets = self.targets[:, networks][steps]
+      self.weights = self.weights[:, networks][steps]
+      self.repeats = self.repeats[:, networks][steps]
+      self.layOut()
+
+   def layOut(self):
+      """Work out where every slot is with the networks end to end."""
+      offsets = np.arange(self.num_networks) * self.initial_values.shape[1]
+      self.flat_sources = self.sources + offsets
+      num_steps, _, num_connections = self.targets.shape
+      self.flat_targets = (self.targets + offsets[:, None]).reshape(
+         num_steps, self.num_networks * num_connections)
+
+   def activateNetwork(self, inputs):
+      """
+      Activate every network, each with its own inputs.
+
+      Args:
+         inputs: an array with a row of inputs for every network.
+
+      Returns:
+         outputs: an array with a row of outputs for every network.  An
+         output with no incoming connections is NO_OUTPUT.
+      """
+      values = self.initial_values.copy()
+      values[:, :self.num_input_slots] = inputs
+      flat_values = values.ravel()
+
+      for step in range(self.flat_sources.shape[0]):
+         activation = sigmoidArray(flat_values[self.flat_sources[step]])
+         effect = (self.weights[step] * activation[:, None]).ravel()
+         # add effect to outgoing nodes.  add.at adds a target that is
+         # connected twice in order, but it is much slower.
+         if self.repeats[step].any():
+            np.add.at(flat_values, self.flat_targets[step], effect)
+         else:
+            flat_values[self.flat_targets[step]] += effect
+
+      rows = np.arange(self.num_networks)[:, None]
+      outputs = values[rows, self.output_slots]
+      outputs[~self.connected_outputs] = NO_OUTPUT
+      return outputs
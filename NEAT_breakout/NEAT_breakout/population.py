@@ -14,9 +14,12 @@ calculating the delta distance between two genomes.
 
 import species
 from geneIndex import gene_index
+from timing import timings
 
 import random
 
+import numpy as np
+
 # the amount of influence the weight differences and gene differences
 # between genomes affect their inclusion in the same species.  Should be 
 # numbers from 0 to 1, and should sum to 1.
@@ -32,6 +35,27 @@ GENERATION_SIZE = 200
 # the maximum portion of the population that can be taken by any one species
 MAX_PORTION = 0.2
 
+# deltas computed with arrays are added up in a different order than
+# deltaGenome(), so any this close to DISJOINT_THRESHOLD are checked again
+# with deltaGenome() to make sure they land on the same side of it
+THRESHOLD_TOLERANCE = 1e-9
+
+# the most genomes compared with the representatives at once
+SPECIATION_BATCH = 32
+
+# the number of representatives compared with them in the first block,
+# and how many times bigger each block is than the one before
+FIRST_BLOCK = 32
+BLOCK_GROWTH = 2
+
+# MinHash signatures hash innovation numbers with (a * x + b) % MIN_HASH_PRIME,
+# using a and b drawn from their own generator, so that using MinHash
+# doesn't change what the rest of the program draws
+MIN_HASH_PRIME = 2 ** 31 - 1
+MIN_HASH_SEED = 499
+# the most cells worked out at once when making signatures
+MIN_HASH_CHUNK = 1 << 20
+
 # DT and GS trials
 # .6 and 700: 7591s (started with a 4000 in gen0)
 # .5 and 200: 253s, 5112s, 11730s, quit (~12h), 4972s, quit, quit,
@@ -42,11 +66,41 @@ class Population():
    Overarching class that keeps track of all of the species in our experiment.
    Basically, the gene pool that contains all species of life.
    """
-   def __init__(self):
+   def __init__(self, min_hash = None, mating = None, species_list = None):
+      """
+      Initialize a population of GENERATION_SIZE species.
+
+      Args:
+         min_hash: (bands, rows) to sort genomes into species with a
+         MinHashIndex, or None to compare them with every representative
+         mating: a reproduction.ParallelMating to mate the species with,
+         or None to mate them one after another
+         species_list: the species to start with instead, such as the
+         ones checkpoint.load() reads, in the order a population listed
+         them
+      """
       self.species = {}
       self.generation = 0
       self.total_average_fitness = 0
-      self.newGeneration()
+      self.min_hash = min_hash
+      self.mating = mating
+      # {(island, innovation): innovation} of every innovation of
+      # another island's that this one has renumbered, see
+      # islands.adoptGenome()
+      self.translation = {}
+      if species_list == None:
+         self.newGeneration()
+      else:
+         # A dictionary lists small numbers in the order they fall in
+         # its table, which grows as numbers are added but never shrinks
+         # while species die out and their names are given out again.
+         # Growing the table the way newGeneration() does lists the
+         # species in the same order as the population they came from.
+         self.species = dict.fromkeys(range(GENERATION_SIZE))
+         for i in range(GENERATION_SIZE):
+            del self.species[i]
+         for specie in species_list:
+            self.species[specie.name] = specie
       
    def newGeneration(self):
       """Make GENERATION_SIZE species with one genome each."""
@@ -55,10 +109,13 @@ class Population():
          
    def nextGeneration(self):
       """Create the next generation through breeding."""
-      self.sortTheGenomesIntoSpecies()
-      self.removeLowestPerformers()
+      with timings.timer("speciation"):
+         self.sortTheGenomesIntoSpecies()
+      with timings.timer("elimination"):
+         self.removeLowestPerformers()
       self.allocateSpecies()
-      self.pruneStaleSpecies()
+      with timings.timer("staleness"):
+         self.pruneStaleSpecies()
       self.generation += 1
       
    def pruneStaleSpecies(self):
@@ -81,11 +138,11 @@ class Population():
       """
       # get the representative genome for each species
       representative_genomes = {}
-      temp_genomes = []
+      temp_genomes = []  # [(species it came from, genome)]
       for i, specie in self.species.items():
          if specie.genomes:
             for j, genome in specie.genomes.items():
-               temp_genomes.append(genome)
+               temp_genomes.append((i, genome))
             representative_genomes[i] = specie.getRandomGenome()
             # take out the genomes from the original species.
             specie.genomes = {}
@@ -93,23 +150,38 @@ class Population():
             pass
       
       
-      # look at all genomes in all species and put them into new species
-      for genome in temp_genomes:
-         found = False
-         # does the genome match one of the representative species
-         for k, rep_genome in representative_genomes.items():
-            if deltaGenome(genome, rep_genome) < DISJOINT_THRESHOLD:
+      if self.min_hash:
+         bands, rows = self.min_hash
+         representatives = MinHashIndex(representative_genomes,
+                                        [genome for _, genome in temp_genomes],
+                                        bands, rows)
+      else:
+         representatives = RepresentativeIndex(representative_genomes)
+      free_names = freeNames(representative_genomes)
+      
+      # look at all genomes in all species and put them into new species,
+      # a batch at a time.  A batch stops at a genome that gets a new
+      # species, so batches are kept small while that keeps happening.
+      position = 0
+      batch_size = 1
+      while position < temp_genomes.__len__():
+         batch = temp_genomes[position:position + batch_size]
+         # does the genome match one of the representative species.
+         # It most likely matches the species it came from.
+         names = representatives.findSpecies(
+            [genome for _, genome in batch],
+            [old_species for old_species, _ in batch])
+         for (old_species, genome), k in zip(batch, names):
+            if k != None:
                self.species[k].addGenome(genome)
-               found = True
-               break
-         # if not, make a new species for it 
-         if found == False:
-            l = 0
-            while l in representative_genomes:
-               l += 1
-            self.species[l] = species.Species(l)
-            self.species[l].genomes[0] = genome
-            representative_genomes[l] = genome
+            # if not, make a new species for it 
+            else:
+               l = next(free_names)
+               self.species[l] = species.Species(l)
+               self.species[l].genomes[0] = genome
+               representatives.add(l, genome)
+         position += names.__len__()
+         batch_size = min(SPECIATION_BATCH, 2 * names.__len__())
       
       # clean out the empty species
       for i, specie in self.species.items():
@@ -123,6 +195,23 @@ class Population():
       Since the number of "organisms" is limited by GENERATION_SIZE, it
       is a very competitive world.
       """
+      with timings.timer("allocation"):
+         allocation_amount = self.allocateAmounts()
+      with timings.timer("mating"):
+         if self.mating:
+            self.mating.mateSpecies(self, allocation_amount)
+         else:
+            for specie, allocated in allocation_amount.items():
+               self.species[specie].mateGenomes(allocated)
+
+   def allocateAmounts(self):
+      """
+      Work out the amount of population each species gets for the next
+      generation.
+
+      Returns:
+         allocation_amount: a dictionary of {species: allocation amount}
+      """
       allocation_amount = {} # {species: allocation amount}
       average_fitnesses = {}
       total_average_fitness = 0
@@ -157,9 +246,457 @@ class Population():
             total_allocated -= 1
       
       assert(total_allocated == GENERATION_SIZE)
-      for specie, allocated in allocation_amount.items():
-         self.species[specie].mateGenomes(allocated)
+      return allocation_amount
          
+class RepresentativeIndex:
+   """
+   The representative genome of every species, laid out in arrays so
+   that the deltas between many genomes and many representatives are
+   found at once.  There is a row for every representative, in the
+   order they were added, and a column for every innovation any of
+   them has, in the order the innovations turned up.  column_of gives
+   the column of each innovation number, or -1 if it has none.  The
+   arrays are made bigger than they need to be, so that adding a
+   representative doesn't have to copy them every time.
+
+   rank gives the position of each row in the order the representatives
+   dictionary lists them, which is the order they are checked in.
+   """
+   def __init__(self, representative_genomes):
+      """
+      Index the representative genomes.
+
+      Args:
+         representative_genomes: a dictionary of {species: genome}.  New
+         representatives are added to it by add().
+      """
+      self.representative_genomes = representative_genomes
+      self.names = []   # the species of each row
+      self.rows = {}    # {species: row}
+      self.lengths = np.zeros(0, dtype=int)
+      self.column_of = np.zeros(0, dtype=int)
+      self.number_columns = 0
+      self.has_gene = np.zeros((16, 16), dtype=bool)
+      self.weights = np.zeros(self.has_gene.shape)
+      # each representative's genes are only turned into arrays once
+      self.addRows(representative_genomes.keys(),
+                   [geneArrays(genome) for genome in
+                    representative_genomes.values()])
+      self.rankRows()
+
+   def rankRows(self):
+      """Find where each row comes in the representatives dictionary."""
+      self.order = np.array([self.rows[name] for name in
+                             self.representative_genomes], dtype=int)
+      self.rank = np.empty(self.order.__len__(), dtype=int)
+      self.rank[self.order] = np.arange(self.order.__len__())
+
+   def add(self, name, genome):
+      """
+      Add a representative genome.
+
+      Args:
+         name: the name of the species it represents
+         genome: the representative genome
+      """
+      self.representative_genomes[name] = genome
+      self.addRows([name], [geneArrays(genome)])
+      self.rankRows()
+
+   def addRows(self, names, gene_arrays):
+      """
+      Add a row for each of some representatives.
+
+      Args:
+         names: the species each one represents
+         gene_arrays: the geneArrays() of each one
+      """
+      if not names:
+         return
+      innovations = np.concatenate([i for i,_ in gene_arrays])
+      weights = np.concatenate([w for _,w in gene_arrays])
+      lengths = np.array([i.__len__() for i,_ in gene_arrays])
+      # give the innovations that don't have a column yet the next ones
+      if innovations.__len__() and \
+         innovations.max() >= self.column_of.__len__():
+         column_of = np.empty(max(2 * self.column_of.__len__(),
+                                  innovations.max() + 1), dtype=int)
+         column_of.fill(-1)
+         column_of[:self.column_of.__len__()] = self.column_of
+         self.column_of = column_of
+      new_innovations = np.unique(innovations[self.column_of[innovations]
+                                              == -1])
+      self.column_of[new_innovations] = np.arange(
+         self.number_columns, self.number_columns + new_innovations.__len__())
+      self.number_columns += new_innovations.__len__()
+
+      first_row = self.names.__len__()
+      number_rows, number_columns = self.has_gene.shape
+      if first_row + names.__len__() > number_rows or \
+         self.number_columns > number_columns:
+         while first_row + names.__len__() > number_rows:
+            number_rows *= 2
+         while self.number_columns > number_columns:
+            number_columns *= 2
+         has_gene = np.zeros((number_rows, number_columns), dtype=bool)
+         all_weights = np.zeros(has_gene.shape)
+         old_rows, old_columns = self.has_gene.shape
+         has_gene[:old_rows, :old_columns] = self.has_gene
+         all_weights[:old_rows, :old_columns] = self.weights
+         self.has_gene = has_gene
+         self.weights = all_weights
+
+      rows = np.repeat(np.arange(first_row, first_row + names.__len__()),
+                       lengths)
+      columns = self.column_of[innovations]
+      self.has_gene[rows, columns] = True
+      self.weights[rows, columns] = weights
+      self.lengths = np.append(self.lengths, lengths)
+      for row, name in enumerate(names, first_row):
+         self.rows[name] = row
+         self.names.append(name)
+
+   def deltas(self, gene_arrays, rows):
+      """
+      Find the deltas between some genomes and some of the
+      representatives, the same as deltaGenome() up to rounding.
+
+      Args:
+         gene_arrays: the geneArrays() of each genome
+         rows: an array of the rows to compare them with
+
+      Returns:
+         deltas: an array of deltas, with a row for each of rows and a
+         column for each genome
+      """
+      innovations = np.concatenate([i for i,_ in gene_arrays])
+      weights = np.concatenate([w for _,w in gene_arrays])
+      lengths = np.array([i.__len__() for i,_ in gene_arrays])
+      owners = np.repeat(np.arange(lengths.__len__()), lengths)
+
+      known = innovations < self.column_of.__len__()
+      columns = np.where(known, self.column_of[np.where(known, innovations,
+                                                        0)], -1)
+      shared = columns != -1
+      # the cells of the rows and the genomes' columns, in the arrays
+      # laid out flat
+      cells = rows[:, None] * self.has_gene.shape[1] + columns[shared]
+      has_gene = self.has_gene.ravel()[cells]
+      differences = has_gene * np.abs(self.weights.ravel()[cells] -
+                                      weights[shared])
+
+      # add up each genome's shared genes, which come one genome after
+      # another.  A genome without any gets nothing added up.
+      number_shared = np.bincount(owners[shared],
+                                  minlength=lengths.__len__())
+      number_matching = np.zeros((rows.__len__(), lengths.__len__()),
+                                 dtype=int)
+      weight_difference = np.zeros(number_matching.shape)
+      sharing = np.flatnonzero(number_shared)
+      if sharing.__len__():
+         starts = (np.cumsum(number_shared) - number_shared)[sharing]
+         number_matching[:, sharing] = np.add.reduceat(has_gene, starts,
+                                                       axis=1)
+         weight_difference[:, sharing] = np.add.reduceat(differences,
+                                                         starts, axis=1)
+
+      rep_lengths = self.lengths[rows][:, None]
+      number_disjoint = lengths + rep_lengths - 2 * number_matching
+      larger_genome_length = np.maximum(lengths, rep_lengths)
+      # the deltas that would divide by 0 are filled in below
+      delta_topology = DISJOINT_GENE * number_disjoint \
+                       / np.maximum(larger_genome_length, 1).astype(float)
+      delta_weight = DISJOINT_WEIGHT * weight_difference \
+                     / np.maximum(number_matching, 1)
+      deltas = delta_topology + delta_weight
+      deltas[number_matching == 0] = 9
+      deltas[larger_genome_length == 0] = 0
+      return deltas
+
+   def below(self, genomes, gene_arrays, rows):
+      """
+      Find which of some rows have a deltaGenome() to each of some
+      genomes that is below DISJOINT_THRESHOLD.
+
+      Args:
+         genomes: the genomes to compare
+         gene_arrays: the geneArrays() of each genome
+         rows: an array of the rows to compare them with
+
+      Returns:
+         below: a boolean array, with a row for each of rows and a
+         column for each genome
+      """
+      deltas = self.deltas(gene_arrays, rows)
+      close = np.abs(deltas - DISJOINT_THRESHOLD) <= THRESHOLD_TOLERANCE
+      for i, j in zip(*np.nonzero(close)):
+         rep_genome = self.representative_genomes[self.names[rows[i]]]
+         deltas[i, j] = deltaGenome(genomes[j], rep_genome)
+      return deltas < DISJOINT_THRESHOLD
+
+   def possible(self, genomes, gene_arrays, likely_rows):
+      """
+      Find the rows that each genome could match.  The number of genes
+      alone rules out the rest.
+
+      Args:
+         genomes: the genomes to compare
+         gene_arrays: the geneArrays() of each genome
+         likely_rows: the row of the species each genome is most likely
+         to match, or -1
+
+      Returns:
+         possible: a boolean array, with a row for each genome and a
+         column for each row
+      """
+      # the disjoint genes are at least the difference in length, and
+      # the weights only add to the delta, so that bounds it from below
+      lengths = np.array([i.__len__() for i,_ in gene_arrays])[:, None]
+      least_deltas = DISJOINT_GENE * np.abs(lengths - self.lengths) \
+         / np.maximum(np.maximum(lengths, self.lengths), 1).astype(float)
+      return least_deltas < DISJOINT_THRESHOLD + THRESHOLD_TOLERANCE
+
+   def findSpecies(self, genomes, likely):
+      """
+      Find the species of genomes, one after another, which is the first
+      representative, in the order the dictionary lists them, whose
+      deltaGenome() to the genome is below DISJOINT_THRESHOLD.  A genome
+      without one gets a new species, which changes the representatives,
+      so the search stops at the first genome without one.
+
+      Representatives are checked a block at a time in the order the
+      dictionary lists them, and a genome stops being checked once it
+      has a match.  Each genome is also checked against the species it
+      is likely to match along with the first block.  If it matches,
+      only the representatives listed before that one need checking.
+      Only the representatives possible() gives for a genome are
+      checked.
+
+      Args:
+         genomes: the genomes to compare
+         likely: the species each genome is most likely to match
+
+      Returns:
+         names: the species of each genome, up to and including the
+         first one without a species, which gets None
+      """
+      if not self.representative_genomes:
+         return [None]
+      gene_arrays = [geneArrays(genome) for genome in genomes]
+      number_genomes = genomes.__len__()
+      number_rows = self.names.__len__()
+
+      likely_rows = np.array([self.rows.get(name, -1) for name in likely])
+      possible = self.possible(genomes, gene_arrays, likely_rows)
+      limits = np.empty(number_genomes, dtype=int)
+      limits.fill(number_rows)
+      found = np.empty(number_genomes, dtype=int)
+      found.fill(-1)
+      start = 0
+      block = FIRST_BLOCK
+      while start < number_rows:
+         checking = np.flatnonzero((found == -1) & (start < limits))
+         if not checking.__len__():
+            break
+         rows = self.order[start:min(start + block, limits[checking].max())]
+         if start == 0:
+            # add the likely rows on the end
+            rows = np.union1d(likely_rows[likely_rows != -1], rows)
+            rows = rows[np.argsort(self.rank[rows])]
+         rows = rows[possible[checking][:, rows].any(axis=0)]
+         if rows.__len__():
+            below = self.below([genomes[j] for j in checking],
+                               [gene_arrays[j] for j in checking], rows)
+            if start == 0:
+               # a genome that matches its likely species only needs
+               # the rows that rank before it
+               in_rows = np.searchsorted(self.rank[rows],
+                                         self.rank[likely_rows[checking]])
+               in_rows = np.minimum(in_rows, rows.__len__() - 1)
+               matched = (likely_rows[checking] != -1) & \
+                         (rows[in_rows] == likely_rows[checking]) & \
+                         below[in_rows, np.arange(checking.__len__())]
+               limits[checking[matched]] = \
+                  self.rank[likely_rows[checking[matched]]] + 1
+            # only rows in the block count, and only before the limit,
+            # and only the rows possible for each genome
+            below &= self.rank[rows][:, None] < \
+                     np.minimum(limits[checking], start + block)
+            below &= possible[checking][:, rows].T
+            matched = below.any(axis=0)
+            found[checking[matched]] = rows[below.argmax(axis=0)[matched]]
+         start += block
+         block *= BLOCK_GROWTH
+
+      names = []
+      for row in found:
+         if row == -1:
+            names.append(None)
+            break
+         names.append(self.names[row])
+      return names
+
+class MinHashIndex(RepresentativeIndex):
+   """
+   A RepresentativeIndex that only checks each genome against a short
+   list of candidates for its species, instead of every representative.
+   A genome can miss the species the full check would give it, and end
+   up in another one or a new one.
+
+   Most of a delta is the share of genes the two genomes don't have in
+   common, which is close to how different their sets of innovation
+   numbers are.  Each genome gets a MinHash signature of bands * rows
+   numbers, the lowest of a different hash of its innovation numbers
+   in each.  Two genomes share each number with a chance equal to the
+   Jaccard similarity of their innovations, and a representative is a
+   candidate if all rows of any band match.  More bands find more of
+   the matches, and more rows make fewer candidates.  The species a
+   genome came from is always a candidate.
+
+   Genomes close enough to share a species have a similarity of at
+   least about 0.47.  At that similarity, 16 bands of 2 rows find 98%
+   of them, and 8 bands of 4 rows find 34%.
+   """
+   def __init__(self, representative_genomes, genomes, bands, rows):
+      """
+      Index the representative genomes.
+
+      Args:
+         representative_genomes: a dictionary of {species: genome}.  New
+         representatives are added to it by add().
+         genomes: every genome that will be looked up or added, so their
+         signatures can all be made at once
+         bands: the number of bands in a signature
+         rows: the number of rows in each band
+      """
+      self.bands = bands
+      self.band_rows = rows
+      generator = np.random.RandomState(MIN_HASH_SEED)
+      self.multipliers = generator.randint(1, MIN_HASH_PRIME,
+                                           bands * rows).astype(np.int64)
+      self.offsets = generator.randint(0, MIN_HASH_PRIME,
+                                       bands * rows).astype(np.int64)
+      self.band_keys = {}  # {id(genome): the key of each band}
+      everything = genomes + representative_genomes.values()
+      for genome, signature in zip(everything, self.sign(everything)):
+         self.band_keys[id(genome)] = self.bandKeys(signature)
+      self.buckets = [{} for i in range(bands)]  # [{band key: [row]}]
+      RepresentativeIndex.__init__(self, representative_genomes)
+      for name, genome in representative_genomes.items():
+         self.addBuckets(self.rows[name], genome)
+
+   def sign(self, genomes):
+      """
+      Make the MinHash signatures of some genomes.
+
+      Args:
+         genomes: the genomes
+
+      Returns:
+         signatures: an array with a row of bands * rows numbers for
+         each genome.  A genome without genes gets MIN_HASH_PRIME in
+         every column.
+      """
+      signatures = np.empty((genomes.__len__(), self.multipliers.__len__()),
+                            dtype=np.int64)
+      signatures.fill(MIN_HASH_PRIME)
+      # a chunk of genomes at a time, so the hashes don't fill memory
+      longest = max([genome.innovations.__len__() for genome in genomes]
+                    + [1])
+      per_chunk = max(1, MIN_HASH_CHUNK /
+                         (self.multipliers.__len__() * longest))
+      for start in range(0, genomes.__len__(), per_chunk):
+         chunk = genomes[start:start + per_chunk]
+         lengths = np.array([genome.innovations.__len__()
+                             for genome in chunk])
+         having = np.flatnonzero(lengths)
+         if not having.__len__():
+            continue
+         innovations = np.concatenate([geneArrays(chunk[i])[0]
+                                       for i in having]).astype(np.int64)
+         hashes = (self.multipliers[:, None] * innovations +
+                   self.offsets[:, None]) % MIN_HASH_PRIME
+         starts = np.cumsum(lengths[having]) - lengths[having]
+         signatures[start + having] = \
+            np.minimum.reduceat(hashes, starts, axis=1).T
+      return signatures
+
+   def bandKeys(self, signature):
+      """Split a signature into the key of each band."""
+      return [signature[i * self.band_rows:(i + 1) * self.band_rows]
+              .tostring() for i in range(self.bands)]
+
+   def keysOf(self, genome):
+      """Get the key of each band of a genome's signature."""
+      if id(genome) not in self.band_keys:
+         self.band_keys[id(genome)] = self.bandKeys(self.sign([genome])[0])
+      return self.band_keys[id(genome)]
+
+   def addBuckets(self, row, genome):
+      """Put a representative's row in the bucket of each of its bands."""
+      for buckets, key in zip(self.buckets, self.keysOf(genome)):
+         buckets.setdefault(key, []).append(row)
+
+   def add(self, name, genome):
+      """
+      Add a representative genome.
+
+      Args:
+         name: the name of the species it represents
+         genome: the representative genome
+      """
+      RepresentativeIndex.add(self, name, genome)
+      self.addBuckets(self.rows[name], genome)
+
+   def possible(self, genomes, gene_arrays, likely_rows):
+      """
+      Find the rows that each genome could match, which are its
+      candidates that its number of genes doesn't rule out.
+      """
+      candidates = np.zeros((genomes.__len__(), self.names.__len__()),
+                            dtype=bool)
+      for j, genome in enumerate(genomes):
+         for buckets, key in zip(self.buckets, self.keysOf(genome)):
+            candidates[j, buckets.get(key, ())] = True
+      having = np.flatnonzero(likely_rows != -1)
+      candidates[having, likely_rows[having]] = True
+      return candidates & RepresentativeIndex.possible(self, genomes,
+                                                       gene_arrays,
+                                                       likely_rows)
+
+def freeNames(taken):
+   """
+   Give out the numbers that are not in taken, from lowest to highest.
+   Numbers added to taken after they are given out are fine, but
+   numbers must never be taken back out of it.
+
+   Args:
+      taken: a set or dictionary of the numbers in use
+   """
+   name = 0
+   while True:
+      if name not in taken:
+         yield name
+      name += 1
+
+def geneArrays(genome):
+   """
+   Get a genome's genes as arrays, in order of innovation number.
+
+   Args:
+      genome: the genome
+
+   Returns:
+      innovations: an array of innovation numbers
+      weights: an array of the matching weights
+   """
+   if not genome.innovations:
+      return np.zeros(0, dtype=np.intc), np.zeros(0)
+   # copies, so that they don't change if the genome does
+   innovations = np.frombuffer(genome.innovations, dtype=np.intc).copy()
+   weights = np.frombuffer(genome.weights, dtype=float).copy()
+   return innovations, weights
+
 def deltaGenome(genome1, genome2):
    """
    Determine the delta, or the genetic difference between two genomes.
@@ -171,27 +708,39 @@ def deltaGenome(genome1, genome2):
    Returns:
       delta: the difference between genomes
    """
-   set1 = set(genome1.genes)
-   set2 = set(genome2.genes)
-   disjoint_set = set1 ^ set2
-   larger_genome_length = max(set1.__len__(), set2.__len__())
+   innovations1 = genome1.innovations
+   innovations2 = genome2.innovations
+   larger_genome_length = max(innovations1.__len__(),
+                              innovations2.__len__())
    if larger_genome_length == 0:
       return 0
    
-   number_disjoint_genes = disjoint_set.__len__()
+   # go through both genomes' genes in order of innovation number,
+   # adding up the weight differences of the genes they both have
+   number_matching_genes = 0
+   weight_difference = 0
+   i = j = 0
+   while i < innovations1.__len__() and j < innovations2.__len__():
+      if innovations1[i] < innovations2[j]:
+         i += 1
+      elif innovations2[j] < innovations1[i]:
+         j += 1
+      else:
+         weight1 = genome1.weights[i]
+         weight2 = genome2.weights[j]
+         weight_difference += abs(weight1 - weight2)
+         number_matching_genes += 1
+         i += 1
+         j += 1
+   number_disjoint_genes = innovations1.__len__() + \
+                           innovations2.__len__() - 2 * number_matching_genes
    
    delta_topology = DISJOINT_GENE * number_disjoint_genes/larger_genome_length
    
-   matching_set = set1 & set2
-   if matching_set.__len__() == 0:
+   if number_matching_genes == 0:
       return 9
    
-   weight_difference = 0
-   for i in matching_set:
-      weight1 = genome1.genes[i].weight
-      weight2 = genome2.genes[i].weight
-      weight_difference += abs(weight1 - weight2)
-   delta_weight = DISJOINT_WEIGHT * weight_difference / matching_set.__len__()
+   delta_weight = DISJOINT_WEIGHT * weight_difference / number_matching_genes
    
    delta = delta_topology + delta_weight
-   return delta
\ No newline at end of file
+   return delta
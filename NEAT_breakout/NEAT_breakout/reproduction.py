@@ -0,0 +1,120 @@
+"""
+reproduction.py
+Author: James Richter
+Class: CS 499, Twitchell/Burton
+Last Updated: 10/18/2026
+
+Mates every species of a generation at the same time, on a pool of
+worker processes.
+
+Two things stop species from mating on their own: they all draw from
+the one random number generator, in turn, and every structural
+mutation writes its innovation to the one gene_index.  So each species
+mates with a random number generator seeded for it alone, with the
+seeds drawn in the order the species are allocated, and while it
+mates the gene_index only records the connections asked for, with a
+provisional number for each (see geneIndex.py).  Once every species
+has mated, the requests are merged species by species, in the same
+order, into real innovation numbers, and the children's genes are
+renumbered with them.  A connection that several species made in the
+same generation gets one innovation number.
+
+Nothing a species does depends on where it mates, or on what the
+other species do, so the next generation comes out the same for any
+number of worker processes.  Species and their children are pickled
+even when they mate on this process, since pickling can change the
+order dictionaries and sets list their items in, and that order is
+what random.sample() and sorted() see.  It is not the same generation the
+serial Population.allocateSpecies() would breed, since the random
+numbers are drawn differently.
+"""
+
+from geneIndex import gene_index, PROVISIONAL_INNOVATION
+
+import cPickle as pickle
+import multiprocessing
+import random
+
+def mateSpecies(task):
+   """
+   Mate one species.  This runs on a worker process, or on the driver
+   when there are no workers.
+
+   Args:
+      task: (specie, allocated, seed), pickled: the Species, the number
+      of children it gets, and the seed of its random number generator
+
+   Returns:
+      (genomes, requests), pickled: the children, keyed the same as
+      Species.genomes, and the innovations they asked for, from
+      GeneIndex.stopRecording()
+   """
+   specie, allocated, seed = pickle.loads(task)
+   # the driver's own random state carries on afterwards
+   random_state = random.getstate()
+   random.seed(seed)
+   gene_index.startRecording()
+   try:
+      specie.mateGenomes(allocated)
+   finally:
+      requests = gene_index.stopRecording()
+      random.setstate(random_state)
+   return pickle.dumps((specie.genomes, requests), pickle.HIGHEST_PROTOCOL)
+
+class ParallelMating:
+   """Mates the species of a population, on worker processes if asked."""
+   def __init__(self, workers = 1):
+      """
+      Start the worker processes.
+
+      Args:
+         workers: the number of processes to mate species on.  With 1,
+         species mate on this process, in the same way.
+      """
+      self.workers = workers
+      self.process_pool = None
+      if workers > 1:
+         self.process_pool = multiprocessing.Pool(workers)
+
+   def mateSpecies(self, pool, allocation_amount):
+      """
+      Mate every species, replacing its genomes with its children.
+
+      Args:
+         pool: the Population
+         allocation_amount: a dictionary of {species: allocation amount}
+      """
+      mating = []
+      tasks = []
+      for name, allocated in allocation_amount.items():
+         # drawn even for a species without children, so that the
+         # seeds don't depend on how many children each one gets
+         seed = random.randrange(2 ** 31)
+         if allocated:
+            mating.append(pool.species[name])
+            tasks.append(pickle.dumps((pool.species[name], allocated, seed),
+                                      pickle.HIGHEST_PROTOCOL))
+         else:
+            pool.species[name].genomes = {}
+      if self.process_pool:
+         # one species per task, since species take very different
+         # amounts of time
+         results = self.process_pool.map(mateSpecies, tasks, chunksize=1)
+      else:
+         results = map(mateSpecies, tasks)
+
+      merged = {}
+      for specie, result in zip(mating, results):
+         genomes, requests = pickle.loads(result)
+         innovations = gene_index.merge(requests, merged)
+         for genome1 in genomes.values():
+            genome1.renumberGenes([
+               innovations[innov - PROVISIONAL_INNOVATION]
+               if innov >= PROVISIONAL_INNOVATION else innov
+               for innov in genome1.innovations])
+         specie.genomes = genomes
+
+   def close(self):
+      """Stop the worker processes."""
+      if self.process_pool:
+         self.process_pool.terminate()
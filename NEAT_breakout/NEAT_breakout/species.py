@@ -20,9 +20,12 @@ other species that are onto a good idea, but haven't quite made it yet.
 
 from genome import Genome
 
+from array import array
 import random
 import math
 
+import numpy as np
+
 INPUTS = 3
 OUTPUTS = 2
 
@@ -33,9 +36,103 @@ STALENESS_THRESHOLD  = 2
 # chance that a child gene will inherit from the more fit parent
 GENE_DOMINANCE = 0.79
 
+# parents with this many genes between them, or more, are crossed over
+# with NumPy, which costs more to set up than it saves on small genomes
+VECTOR_CROSSOVER_GENES = 48
+
 # chance that a stale species will have a single survivor
 SOLE_SURVIVOR_CHANCE = 0.2
 
+def mergeGenes(genome1, genome2, genome3):
+   """
+   Give a child the genes of its parents, and the nodes of those genes.
+   Every innovation either parent has, in order, gets one draw: below
+   GENE_DOMINANCE the gene comes from genome1, if genome1 has it, and
+   otherwise from genome2, if genome2 has it.
+
+   Args:
+      genome1: the fitter parent
+      genome2: the other parent
+      genome3: the child, without any genes yet
+   """
+   # go through both parents' genes in order of innovation number
+   innovations1 = genome1.innovations
+   innovations2 = genome2.innovations
+   length1 = innovations1.__len__()
+   length2 = innovations2.__len__()
+   i = j = 0
+   while i < length1 or j < length2:
+      # find the next innovation, and which parents have it
+      if j == length2 or (i < length1 and
+                          innovations1[i] <= innovations2[j]):
+         innov = innovations1[i]
+      else:
+         innov = innovations2[j]
+      in_genome1 = i < length1 and innovations1[i] == innov
+      in_genome2 = j < length2 and innovations2[j] == innov
+
+      if random.random() < GENE_DOMINANCE:
+         if in_genome1:
+            genome3.inheritGene(genome1, i)
+      else:
+         if in_genome2:
+            genome3.inheritGene(genome2, j)
+
+      if in_genome1:
+         i += 1
+      if in_genome2:
+         j += 1
+
+   # creating the nodes
+   genome3.generateNodes()
+
+def crossoverGenes(genome1, genome2, genome3):
+   """
+   The same as mergeGenes(), with the same draws in the same order,
+   but on the parents' gene arrays all at once.
+   """
+   innovations1 = geneArray(genome1.innovations, np.intc)
+   innovations2 = geneArray(genome2.innovations, np.intc)
+   innovations = np.union1d(innovations1, innovations2)
+   random_draw = random.random
+   dominant = np.array([random_draw() for innov in innovations]) \
+              < GENE_DOMINANCE
+   from1 = np.flatnonzero(dominant[np.searchsorted(innovations,
+                                                   innovations1)])
+   from2 = np.flatnonzero(~dominant[np.searchsorted(innovations,
+                                                    innovations2)])
+   # no innovation comes from both, so they only need putting in order
+   order = np.argsort(np.concatenate((innovations1[from1],
+                                      innovations2[from2])),
+                      kind="mergesort")
+   def inherit(values1, values2, dtype):
+      """Get the inherited values of one of the parents' gene arrays."""
+      values = np.concatenate((geneArray(values1, dtype)[from1],
+                               geneArray(values2, dtype)[from2]))
+      return values[order]
+
+   genome3.innovations = array('i', inherit(genome1.innovations,
+                                            genome2.innovations,
+                                            np.intc).tostring())
+   sources = inherit(genome1.sources, genome2.sources, np.intc)
+   targets = inherit(genome1.targets, genome2.targets, np.intc)
+   genome3.sources = array('i', sources.tostring())
+   genome3.targets = array('i', targets.tostring())
+   genome3.weights = array('d', inherit(genome1.weights, genome2.weights,
+                                        float).tostring())
+   genome3.enabled = array('b', inherit(genome1.enabled, genome2.enabled,
+                                        np.int8).tostring())
+   # creating the nodes, in the same order as generateNodes(), since
+   # the order of a set can depend on it
+   genome3.nodes.update(sources.tolist())
+   genome3.nodes.update(targets.tolist())
+
+def geneArray(values, dtype):
+   """View one of a genome's gene arrays as a NumPy array."""
+   if not values:
+      return np.zeros(0, dtype=dtype)
+   return np.frombuffer(values, dtype=dtype)
+
 def inverseExp(x):
    """The inverse exponent function."""
    return 1/(7*math.exp(x))
@@ -46,14 +143,21 @@ class Species:
    functions for adding and mating genomes, as well as
    calculating the average fitness for the species.
    """
-   def __init__(self, name):
-      """Initialize an empty species."""
+   def __init__(self, name, generate = True):
+      """
+      Initialize a species with one new genome.
+
+      Args:
+         name: the name of the species
+         generate: if False, the species starts with no genomes
+      """
       self.genomes = {}     
       self.average_fitness = 0
       self.name = name
       self.staleness = 0
       
-      self.generateGenome()
+      if generate:
+         self.generateGenome()
 
    def __repr__(self):
       string = ""
@@ -166,17 +270,11 @@ class Species:
       assert genome1.fitness >= genome2.fitness  
       genome3 = Genome(INPUTS, OUTPUTS, self.name, None)
       
-      possible_genes = set(genome1.genes) | set(genome2.genes)
-      for innov in possible_genes:
-         if random.random() < GENE_DOMINANCE:
-            if innov in genome1.genes:
-               genome3.genes[innov] = genome1.genes[innov]
-         else:
-            if innov in genome2.genes:
-               genome3.genes[innov] = genome2.genes[innov]
-      
-      # creating the nodes
-      genome3.generateNodes()
+      if genome1.innovations.__len__() + genome2.innovations.__len__() \
+         < VECTOR_CROSSOVER_GENES:
+         mergeGenes(genome1, genome2, genome3)
+      else:
+         crossoverGenes(genome1, genome2, genome3)
       genome3.mutate()
       
       return genome3
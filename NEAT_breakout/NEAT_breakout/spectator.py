@@ -0,0 +1,113 @@
+"""
+spectator.py
+Author: James Richter
+Class: CS 499, Twitchell/Burton
+Last Updated: 10/18/2026
+
+A window for watching training while it runs headless at full speed.
+
+The spectator is a process of its own, with its own game of Breakout.
+Every generation the driver sends it one genome, the best one or one
+picked at random, and the spectator plays that genome in its window
+at the normal frame rate.  When a game ends it moves on to the newest
+genome it was sent.
+
+Genomes only go one way, down a queue that never makes the driver
+wait, so a slow display can't hold training up, and closing the window
+just stops the spectator.
+"""
+
+import breakout
+
+import multiprocessing
+import pickle
+import Queue
+import random
+
+# the joystick values of a game with no genome at the controls yet
+IDLE_ACTION = (0.0, 0.0)
+
+class Spectator:
+   """The driver's end of a spectator process."""
+   def __init__(self, choose = "best"):
+      """
+      Start the spectator process.
+
+      Args:
+         choose: "best" to watch the best genome of every generation,
+         or "random" to watch one picked at random
+      """
+      self.choose = choose
+      # picking at random mustn't change what the training run draws
+      self.chooser = random.Random()
+      self.queue = multiprocessing.Queue()
+      # don't wait for genomes the spectator never read when exiting
+      self.queue.cancel_join_thread()
+      self.process = multiprocessing.Process(target=watch,
+                                             args=(self.queue,))
+      self.process.daemon = True
+      self.process.start()
+
+   def show(self, genomes_list, generation):
+      """
+      Send the spectator a genome from a generation that has been
+      played.  Does nothing once the window has been closed.
+
+      Args:
+         genomes_list: the genomes of the generation, with their fitness
+         generation: the number of the generation
+      """
+      if not self.process.is_alive():
+         return
+      if self.choose == "best":
+         genome1 = max(genomes_list, key=lambda genome1: genome1.fitness)
+      else:
+         genome1 = self.chooser.choice(genomes_list)
+      # pickled now, since the genome can change before the queue's
+      # thread gets around to sending it
+      self.queue.put(pickle.dumps((generation, genome1.fitness, genome1),
+                                  pickle.HIGHEST_PROTOCOL))
+
+   def close(self):
+      """Close the spectator's window."""
+      if self.process.is_alive():
+         self.process.terminate()
+
+def newest(queue, item):
+   """Get the last item waiting in a queue, or item if it is empty."""
+   while True:
+      try:
+         item = queue.get_nowait()
+      except Queue.Empty:
+         return item
+
+def watch(queue):
+   """
+   Play the genomes sent down a queue in a window, until the window is
+   closed.
+
+   Args:
+      queue: the queue the driver sends pickled genomes down
+   """
+   brkout = breakout.Bricka()
+   sent = None
+   while True:
+      sent = newest(queue, sent)
+      activate = lambda observation: IDLE_ACTION
+      caption = "bricka: waiting for the first generation"
+      if sent != None:
+         generation, fitness, genome1 = pickle.loads(sent)
+         activate = genome1.network.activateNetwork
+         caption = "bricka: generation %d, fitness %d" % (generation,
+                                                         fitness)
+      breakout.pygame.display.set_caption(caption)
+
+      observation = brkout.reset()
+      done = False
+      while not done:
+         observation, reward, done, info = brkout.step(activate(observation))
+         if info["closed"]:
+            return
+         # keep the idle game short, to pick up the first genome soon
+         if sent == None and not queue.empty():
+            break
@@ -0,0 +1,318 @@
+"""
+steadyState.py
+Author: James Richter
+Class: CS 499, Twitchell/Burton
+Last Updated: 10/18/2026
+
+Evolves the population one genome at a time, the way real-time NEAT
+does, instead of a whole generation at a time.
+
+Training a generation at a time waits for the longest game of the
+generation before any genome can be bred, which leaves the other
+worker processes sitting idle.  Here every game that ends frees up its
+worker straight away: the worst genome that has played is retired, a
+species is picked to breed a child, and the child goes out to be
+played.  The population always has GENERATION_SIZE genomes, some of
+them still playing.
+
+A genome's worth is its fitness shared with the rest of its species,
+so a big species loses its worst genomes first.  A species breeds with
+a chance in proportion to the average fitness of its genomes, as in
+Population.allocateAmounts(), and a species never takes up more than
+MAX_PORTION of the population.  The child is put in the first species
+whose representative it is close to, or a species of its own.
+
+Every GENERATION_SIZE children count as a generation: the species'
+average fitnesses and staleness are brought up to date, and the
+population is checkpointed.  A stale species doesn't breed any more,
+so it dies out as its genomes are retired.
+"""
+
+import breakout
+import checkpoint
+import evaluation
+import fitnessCache
+import population
+import species
+import spectator
+from population import deltaGenome, freeNames
+from population import DISJOINT_THRESHOLD, MAX_PORTION
+
+import multiprocessing
+import Queue
+import random
+import time
+
+class SteadyState:
+   """
+   A population that is bred one child at a time.  Keeps track of the
+   genomes that haven't finished playing, which can't be retired or
+   bred from yet.
+   """
+   def __init__(self, pool):
+      """
+      Start breeding a population one child at a time.  Every genome in
+      it still has to play.
+
+      Args:
+         pool: the population
+      """
+      self.pool = pool
+      self.unscored = set()        # the ids of genomes still playing
+      self.representatives = {}    # {species: genome}
+      self.births = 0
+      for name, specie in pool.species.items():
+         if specie.genomes:
+            self.representatives[name] = specie.getRandomGenome()
+         else:
+            del pool.species[name]
+         for genome1 in specie.genomes.values():
+            self.unscored.add(id(genome1))
+
+   def scored(self, specie):
+      """Get the genomes of a species that have finished playing."""
+      return [genome1 for genome1 in specie.genomes.values()
+              if id(genome1) not in self.unscored]
+
+   def score(self, genome1, fitness):
+      """Give a genome the fitness it finished playing with."""
+      genome1.fitness = fitness
+      self.unscored.discard(id(genome1))
+
+   def canBreed(self):
+      """
+      Check that a genome that has finished playing would be left to
+      breed from after retiring the worst one.  With as many workers as
+      genomes, the first game to end leaves one genome that has played,
+      and retiring it would leave nothing to breed from.
+      """
+      genomes = sum(specie.genomes.__len__()
+                    for specie in self.pool.species.values())
+      return genomes - self.unscored.__len__() > 1
+
+   def retire(self):
+      """
+      Remove the genome with the lowest fitness shared with its species,
+      out of those that have finished playing.  Fitness is shared from
+      just below the lowest fitness, since scores can be negative, and
+      a negative score shared with a big species would go up.
+      """
+      scored = [(name, key, genome1)
+                for name, specie in self.pool.species.items()
+                for key, genome1 in specie.genomes.items()
+                if id(genome1) not in self.unscored]
+      if not scored:
+         return
+      lowest = min(genome1.fitness for _, _, genome1 in scored) - 1
+      worst = None
+      for name, key, genome1 in scored:
+         size = self.pool.species[name].genomes.__len__()
+         shared_fitness = float(genome1.fitness - lowest) / size
+         if worst == None or shared_fitness < worst[0]:
+            worst = (shared_fitness, name, key)
+      shared_fitness, name, key = worst
+      specie = self.pool.species[name]
+      genome1 = specie.genomes.pop(key)
+      if not specie.genomes:
+         del self.pool.species[name]
+         del self.representatives[name]
+      elif self.representatives[name] is genome1:
+         self.representatives[name] = specie.getRandomGenome()
+
+   def chooseSpecies(self):
+      """
+      Pick the species to breed the next child, with a chance in
+      proportion to its average fitness.  Species that are stale, or
+      already have MAX_PORTION of the population, only breed if no
+      other species can.
+
+      Returns:
+         specie: the Species
+      """
+      limit = MAX_PORTION * population.GENERATION_SIZE
+      breeding = []
+      fallback = []
+      for name, specie in self.pool.species.items():
+         parents = self.scored(specie)
+         if not parents:
+            continue
+         average_fitness = sum(genome1.fitness for genome1 in parents) \
+                           / float(parents.__len__())
+         if average_fitness <= 0:
+            average_fitness = 1
+         fallback.append((average_fitness, specie))
+         if specie.staleness <= species.STALENESS_THRESHOLD and \
+            specie.genomes.__len__() < limit:
+            breeding.append((average_fitness, specie))
+      breeding = breeding or fallback
+      pick = random.random() * sum(fitness for fitness, _ in breeding)
+      for average_fitness, specie in breeding:
+         pick -= average_fitness
+         if pick < 0:
+            return specie
+      return breeding[-1][1]
+
+   def breed(self):
+      """
+      Retire the worst genome, and breed a child to take its place.
+
+      Returns:
+         child: the child, which still has to play
+      """
+      self.retire()
+      specie = self.chooseSpecies()
+      parents = self.scored(specie)
+      if parents.__len__() >= 2:
+         genome1, genome2 = random.sample(parents, 2)
+      else:
+         genome1 = genome2 = parents[0]
+      child = specie.mate(genome1, genome2)
+      self.place(child)
+      self.unscored.add(id(child))
+      self.births += 1
+      return child
+
+   def place(self, child):
+      """
+      Put a child in the first species, in the order the species
+      dictionary lists them, whose representative is close enough to
+      it, or in a new species of its own.
+      """
+      for name, specie in self.pool.species.items():
+         if deltaGenome(child, self.representatives[name]) \
+            < DISJOINT_THRESHOLD:
+            child.species = name
+            specie.addGenome(child)
+            return
+      name = next(freeNames(self.pool.species))
+      child.species = name
+      self.pool.species[name] = species.Species(name)
+      self.pool.species[name].genomes[0] = child
+      self.representatives[name] = child
+
+   def endGeneration(self):
+      """
+      Count the last GENERATION_SIZE children as a generation: update
+      the average fitness and staleness of every species, the same way
+      Species.calculateAverageFitness() does, but only from the genomes
+      that have finished playing.
+      """
+      total_average_fitness = 0
+      for specie in self.pool.species.values():
+         parents = self.scored(specie)
+         if not parents:
+            continue
+         old_average_fitness = specie.average_fitness
+         specie.average_fitness = sum(genome1.fitness
+                                      for genome1 in parents) \
+                                  / float(parents.__len__())
+         if specie.average_fitness <= old_average_fitness:
+            specie.staleness += 1
+         total_average_fitness += max(specie.average_fitness, 1)
+      self.pool.total_average_fitness = \
+         total_average_fitness / self.pool.species.__len__()
+      self.pool.generation += 1
+
+def runSteadyState(pool, brkout, workers = 1,
+                   cache_size = fitnessCache.DEFAULT_SIZE,
+                   checkpoint_file = None, skip_idle = False, seed = None,
+                   spectate = None):
+   """
+   Run the Breakout game, breeding a child whenever a game ends.
+
+   Args:
+      pool: a pool of species that contains all of our genomes
+      brkout: an instance of the game breakout, used when workers is 1
+      workers: the number of processes that play games at the same time
+      cache_size: the number of fitness results to remember
+      checkpoint_file: if given, the whole population is saved to this
+      file every generation
+      skip_idle: if True, headless games skip their idle frames
+      seed: the random seed the run started from, which is saved with
+      the action log of every winning game
+      spectate: "best" or "random" to open a spectator window that
+      plays the best genome, or a random one, from every generation
+   """
+   state = SteadyState(pool)
+   process_pool = None
+   if workers > 1:
+      process_pool = multiprocessing.Pool(workers,
+                                          initializer=evaluation.initWorker,
+                                          initargs=(False, skip_idle))
+   watcher = None
+   if spectate:
+      watcher = spectator.Spectator(spectate)
+   cache = fitnessCache.FitnessCache(cache_size)
+   # the wins that have been saved
+   logged = {}
+   log_game = breakout.Bricka(headless=True)
+   # (genome, fingerprint, (fitness, won)) of every game that has ended
+   finished = Queue.Queue()
+   # the games still playing on the workers
+   games = []
+
+   def play(genome1):
+      """Start a genome playing, unless its network has played before."""
+      key = genome1.getNetworkKey()
+      result = cache.get(key)
+      if result != None:
+         finished.put((genome1, key, result))
+      elif process_pool:
+         games.append(process_pool.apply_async(
+            evaluation.evaluateInWorker, (genome1,),
+            callback=lambda (result, snapshot):
+               finished.put((genome1, key, result))))
+      else:
+         finished.put((genome1, key,
+                       evaluation.evaluateGenome(brkout, genome1, skip_idle)))
+
+   try:
+      print "Generation:", pool.generation
+      start_time = time.time()
+      for genome1 in evaluation.getGenomes(pool):
+         play(genome1)
+
+      while True:
+         # a game that raised an exception on its worker never calls
+         # back, so get() raises the exception here instead
+         for game in games:
+            if game.ready() and not game.successful():
+               game.get()
+         games[:] = [game for game in games if not game.ready()]
+         try:
+            # a timeout, so that the wait can be interrupted, and so
+            # that a game that failed is noticed
+            genome1, key, (fitness, won) = finished.get(True, 1)
+         except Queue.Empty:
+            continue
+         if fitness == None:
+            # the window was closed
+            return
+         cache.put(key, (fitness, won))
+         if won:
+            evaluation.saveWin(genome1, key, fitness, logged, log_game,
+                               seed, pool.generation)
+         state.score(genome1, fitness)
+         print "Species ", genome1.species, ":", "Fitness ", fitness
+
+         # keep every worker busy, once the first genomes are nearly done
+         while state.unscored.__len__() < workers and state.canBreed():
+            play(state.breed())
+            if state.births % population.GENERATION_SIZE == 0:
+               state.endGeneration()
+               elapsed = time.time() - start_time
+               print "Generation", pool.generation - 1, \
+                  "had an average fitness of", pool.total_average_fitness, \
+                  "(%d children in %.0f s)" % (state.births, elapsed)
+               if watcher:
+                  watcher.show([genome2 for specie in pool.species.values()
+                                for genome2 in state.scored(specie)],
+                               pool.generation - 1)
+               if checkpoint_file:
+                  checkpoint.save(checkpoint_file, pool)
+               print "Generation:", pool.generation
+   finally:
+      if process_pool:
+         process_pool.terminate()
+      if watcher:
+         watcher.close()
@@ -0,0 +1,119 @@
+"""
+timing.py
+Author: James Richter
+Class: CS 499, Twitchell/Burton
+Last Updated: 10/18/2026
+
+Timers and counters for finding out where a generation spends its time.
+
+Every module records into the one shared timings object.  It starts
+out turned off, and while it is off, timer() hands back a timer that
+does nothing and the other methods return straight away, so leaving
+the timers in costs next to nothing.  The driver turns it on, and
+writes what was recorded as one line of JSON per generation.
+"""
+
+import json
+import time
+
+class NoTimer:
+   """A timer that does nothing, for when timing is turned off."""
+   def __enter__(self):
+      return self
+
+   def __exit__(self, *exception):
+      return False
+
+NO_TIMER = NoTimer()
+
+class PhaseTimer:
+   """Adds the time spent inside a with block to a phase."""
+   def __init__(self, timings, phase):
+      self.timings = timings
+      self.phase = phase
+
+   def __enter__(self):
+      self.start_time = time.time()
+      return self
+
+   def __exit__(self, *exception):
+      self.timings.add(self.phase, time.time() - self.start_time)
+      return False
+
+class Timings:
+   """
+   The time spent in each phase of a generation, and the frames and
+   time each genome took to play.
+   """
+   def __init__(self):
+      self.enabled = False
+      self.reset()
+
+   def reset(self):
+      """Forget everything recorded so far."""
+      self.phases = {}   # {phase: seconds}
+      self.genomes = []  # [(frames, seconds)] for every genome played
+
+   def timer(self, phase):
+      """
+      Get a timer for a with block, that adds the time spent in it to
+      a phase.
+
+      Args:
+         phase: the name of the phase
+      """
+      if not self.enabled:
+         return NO_TIMER
+      return PhaseTimer(self, phase)
+
+   def add(self, phase, seconds):
+      """Add some seconds to a phase."""
+      if self.enabled:
+         self.phases[phase] = self.phases.get(phase, 0) + seconds
+
+   def addGenome(self, frames, seconds):
+      """Record the number of frames a genome played, and how long."""
+      if self.enabled:
+         self.genomes.append((frames, seconds))
+
+   def merge(self, snapshot):
+      """Add in what another process recorded, from its snapshot()."""
+      phases, genomes = snapshot
+      for phase, seconds in phases.items():
+         self.add(phase, seconds)
+      for frames, seconds in genomes:
+         self.addGenome(frames, seconds)
+
+   def snapshot(self):
+      """Get what has been recorded, to send to another process."""
+      return self.phases, self.genomes
+
+   def record(self, **fields):
+      """
+      Get a record of everything recorded, that can be saved as JSON.
+
+      Args:
+         fields: anything else to put in the record
+
+      Returns:
+         record: a dictionary
+      """
+      frames = sum(f for f, _ in self.genomes)
+      # games played at the same time share their time, so the rate is
+      # worked out from the whole evaluation phase
+      seconds = self.phases.get("evaluation", 0)
+      record = {"phases": dict(self.phases),
+                "frames": frames,
+                "frames_per_second": frames / seconds if seconds else None,
+                "genomes": [{"frames": f, "seconds": s,
+                             "frames_per_second": f / s if s else None}
+                            for f, s in self.genomes]}
+      record.update(fields)
+      return record
+
+   def write(self, filename, **fields):
+      """Add a record to the end of a file of JSON lines."""
+      with open(filename, "a") as f:
+         f.write(json.dumps(self.record(**fields), sort_keys=True) + "\n")
+
+timings = Timings()
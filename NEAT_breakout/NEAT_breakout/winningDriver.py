@@ -10,40 +10,82 @@ could be implemented in driver.py but I like it better
 like this, since I can make a separate executable file
 for the training program and the program that displays
 the winning genome.
+
+It plays the latest winning genome, winning_genome.1, winning_genome.2
+and so on, unless it is given another one with --genome.
+
+It can also play back the action log of a winning game, which needs no
+genome at all:
+
+python winningDriver.py --replay winning_game.1
+
+Add --verify to play the log back headless and check its score.
 """
 
+import actionLog
 import breakout
 import genome
 import species
 
+import argparse
 import itertools
 import population
 import time
 import os.path
+import sys
 
-def runBreakout(breakout):
+def runBreakout(breakout, filename = None):
    current_genome = genome.Genome(3, 2, 0, 0)
+   if filename == None:
+      # the latest winner, or one saved before winners were numbered
+      filename = actionLog.latestVersion("winning_genome") or \
+                 "winning_genome"
    try:
-      current_genome.load("./winning_genome")
+      current_genome.load(filename)
    except:
-      print "Unable to find file named \"winning_genome\".  ", \
+      print "Unable to find file named \"%s\".  " % filename, \
              "Run the genetic algorithm to generate the file."
       exit(0)
    current_genome.generateNetwork()
 
-   for item in breakout.run():
+   observation = breakout.reset()
+   while True:
       # plug in the game outputs into the neural network
-      try:
-         game_coords = [x for x in item]
-         inputs = current_genome.activateNetwork(game_coords)
-         inputs = [i for _,i in inputs.items()]
-         breakout.inputs = inputs
-      # start a new game
-      except:
-         pass
-      if breakout.done == True:
+      outputs = current_genome.activateNetwork(observation)
+      observation, reward, done, info = breakout.step(outputs)
+      if info["closed"]:
          break
+      # start a new game
+      if done:
+         observation = breakout.reset()
+
+def replayBreakout(breakout, log):
+   """Play an action log over and over until the window is closed."""
+   while actionLog.replay(log, breakout) != None:
+      pass
 
-brkout = breakout.Bricka()
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser(description="Show the winning genome.")
+   parser.add_argument("--genome", metavar="FILE",
+                       help="the genome to show (default: the latest "
+                            "winning_genome)")
+   parser.add_argument("--replay", metavar="FILE",
+                       help="play back the action log in FILE instead")
+   parser.add_argument("--verify", action="store_true",
+                       help="play the action log back headless, and check "
+                            "the score it ends with")
+   args = parser.parse_args()
 
-runBreakout(brkout)
\ No newline at end of file
+   if args.replay:
+      log = actionLog.load(args.replay)
+      if args.verify:
+         start_time = time.time()
+         matches = actionLog.verify(log)
+         print "%d frames played back in %.1f ms: score %d %s" % \
+               (log.__len__(), (time.time() - start_time) * 1000, log.score,
+                "matches" if matches else "does NOT match")
+         sys.exit(0 if matches else 1)
+      replayBreakout(breakout.Bricka(), log)
+   else:
+      brkout = breakout.Bricka()
+      runBreakout(brkout, args.genome)
\ No newline at end of file